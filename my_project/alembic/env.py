@@ -32,6 +32,13 @@ target_metadata = Base.metadata
 config.set_main_option("sqlalchemy.url", str(setting.db.url))
 
 
+def include_name(name, type_, parent_names) -> bool:
+    # Месячные секции AuthEvents создает приложение, в метаданных их нет
+    if type_ == "table":
+        return not name.startswith("AuthEvents_")
+    return True
+
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -50,6 +57,7 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
     )
 
     with context.begin_transaction():
@@ -57,7 +65,11 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
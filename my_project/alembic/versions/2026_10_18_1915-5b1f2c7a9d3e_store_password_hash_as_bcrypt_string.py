@@ -0,0 +1,83 @@
+"""store password hash as bcrypt string
+
+Revision ID: 5b1f2c7a9d3e
+Revises: 17685eaa99e7
+Create Date: 2026-10-18 19:15:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1f2c7a9d3e"
+down_revision: Union[str, Sequence[str], None] = "17685eaa99e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10_000
+
+CHECK_NAME = "ck_Users_password_hash_length"
+CHECK_CONDITION = "length(password_hash) <= 128"
+
+# hex-строка состоит из [0-9a-f], а хэш bcrypt всегда начинается с "$"
+TO_BCRYPT = """
+    UPDATE "Users"
+    SET password_hash = convert_from(decode(password_hash, 'hex'), 'UTF8')
+    WHERE id IN (
+        SELECT id FROM "Users"
+        WHERE password_hash NOT LIKE '$%'
+        LIMIT {limit}
+    )
+"""
+TO_HEX = """
+    UPDATE "Users"
+    SET password_hash = encode(convert_to(password_hash, 'UTF8'), 'hex')
+    WHERE id IN (
+        SELECT id FROM "Users"
+        WHERE password_hash LIKE '$%'
+        LIMIT {limit}
+    )
+"""
+
+
+def convert_in_batches(statement: str) -> None:
+    """
+    Конвертируем строки пачками, каждая пачка - отдельная транзакция,
+    чтобы не держать блокировку на всей таблице
+    """
+    if context.is_offline_mode():
+        op.execute(sa.text(statement.format(limit="ALL")))
+        return
+    with op.get_context().autocommit_block():
+        while True:
+            result = op.get_bind().execute(sa.text(statement.format(limit=BATCH_SIZE)))
+            if not result.rowcount:
+                break
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    convert_in_batches(TO_BCRYPT)
+    # Сужение varchar(1024) до varchar(128) берет ACCESS EXCLUSIVE
+    # и проверяет всю таблицу. Длину ограничивает CHECK: NOT VALID
+    # добавляется мгновенно, VALIDATE не блокирует чтение и запись.
+    # Каждая команда - своя транзакция, иначе блокировка ADD CONSTRAINT
+    # держалась бы до конца проверки
+    with op.get_context().autocommit_block():
+        op.execute(
+            sa.text(
+                f'ALTER TABLE "Users" ADD CONSTRAINT "{CHECK_NAME}" '
+                f"CHECK ({CHECK_CONDITION}) NOT VALID"
+            )
+        )
+        op.execute(sa.text(f'ALTER TABLE "Users" VALIDATE CONSTRAINT "{CHECK_NAME}"'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint(CHECK_NAME, "Users", type_="check")
+    convert_in_batches(TO_HEX)
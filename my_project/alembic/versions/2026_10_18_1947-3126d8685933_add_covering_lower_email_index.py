@@ -0,0 +1,84 @@
+"""add covering lower email index
+
+Revision ID: 3126d8685933
+Revises: 091aed4134a5
+Create Date: 2026-10-18 19:47:24.275806
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3126d8685933"
+down_revision: Union[str, Sequence[str], None] = "091aed4134a5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEX_NAME = "ix_Users_email_lower"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    connection = op.get_bind()
+    # Уникальный индекс по lower(email) не построится, если в таблице
+    # уже есть почты, отличающиеся только регистром
+    duplicates = (
+        connection.execute(
+            sa.text(
+                'SELECT lower(email) FROM "Users" '
+                "GROUP BY lower(email) HAVING count(*) > 1 LIMIT 10"
+            )
+        )
+        .scalars()
+        .all()
+    )
+    if duplicates:
+        raise RuntimeError(
+            "Emails differing only in case must be merged first: "
+            + ", ".join(duplicates)
+        )
+    # CREATE INDEX CONCURRENTLY не блокирует запись, но не работает
+    # внутри транзакции
+    with op.get_context().autocommit_block():
+        # Прерванная сборка CONCURRENTLY оставляет невалидный индекс
+        op.execute(
+            sa.text(
+                "DO $$ BEGIN "
+                "IF EXISTS (SELECT 1 FROM pg_index "
+                "WHERE indexrelid = to_regclass('\"{name}\"') "
+                "AND NOT indisvalid) THEN "
+                'DROP INDEX "{name}"; '
+                "END IF; END $$".format(name=INDEX_NAME)
+            )
+        )
+        op.create_index(
+            INDEX_NAME,
+            "Users",
+            [sa.literal_column("lower(email)")],
+            unique=True,
+            postgresql_include=[
+                "id",
+                "email",
+                "password_hash",
+                "name",
+                "is_superuser",
+            ],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            INDEX_NAME,
+            table_name="Users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,54 @@
+"""add user updated at
+
+Revision ID: bc351e943397
+Revises: 4634319396da
+Create Date: 2026-10-18 20:26:01.769021
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "bc351e943397"
+down_revision: Union[str, Sequence[str], None] = "4634319396da"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEX_NAME = "ix_Users_updated_at"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Колонка без значения по умолчанию - только изменение каталога
+    op.add_column(
+        "Users",
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # CREATE INDEX CONCURRENTLY не блокирует запись, но не работает
+    # внутри транзакции
+    with op.get_context().autocommit_block():
+        op.create_index(
+            INDEX_NAME,
+            "Users",
+            ["updated_at"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            INDEX_NAME,
+            table_name="Users",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("Users", "updated_at")
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import setting
+from core.model import AuthEvent, db_helper
+from utils.audit import AuditEvent, audit_queue
+from utils.metrics import timed
+
+log = logging.getLogger(__name__)
+
+# Пауза перед повторной записью пачки, растет с номером попытки
+RETRY_DELAY = 0.5
+
+
+def month_start(year: int, month: int) -> datetime:
+    """Начало месяца в UTC; month может выходить за 12"""
+    return datetime(
+        year + (month - 1) // 12,
+        (month - 1) % 12 + 1,
+        1,
+        tzinfo=timezone.utc,
+    )
+
+
+async def ensure_audit_partitions(
+    session: AsyncSession,
+    months_ahead: int,
+) -> list[str]:
+    """
+    Создаем месячные секции AuthEvents: текущую и months_ahead следующих
+    (python -m scripts.audit_partitions, не в рабочих процессах).
+    События вне секций попадают в AuthEvents_default (создается миграцией).
+    Секцию нельзя создать, если в AuthEvents_default уже есть строки
+    за ее месяц: ошибка пишется в лог, остальные месяцы создаются
+    args:
+        session: AsyncSession — сессия базы данных
+        months_ahead: int - Сколько следующих месяцев подготовить
+    return:
+        failed: list[str] - Секции, которые не удалось создать
+    """
+    table = AuthEvent.__tablename__
+    now = datetime.now(timezone.utc)
+    # Задачу могут запустить одновременно несколько контейнеров
+    await session.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext(:table))"),
+        {"table": table},
+    )
+    failed = []
+    for offset in range(months_ahead + 1):
+        start = month_start(now.year, now.month + offset)
+        end = month_start(now.year, now.month + offset + 1)
+        partition = f"{table}_{start:%Y_%m}"
+        try:
+            async with session.begin_nested():
+                await session.execute(
+                    text(
+                        f'CREATE TABLE IF NOT EXISTS "{partition}" '
+                        f'PARTITION OF "{table}" '
+                        f"FOR VALUES FROM ('{start.isoformat()}') "
+                        f"TO ('{end.isoformat()}')"
+                    )
+                )
+        except DBAPIError:
+            log.exception("Failed to create audit partition %s", partition)
+            failed.append(partition)
+    await session.commit()
+    return failed
+
+
+@timed("audit_write")
+async def insert_auth_events(
+    session: AsyncSession,
+    events: list[AuditEvent],
+) -> None:
+    """
+    Пишем пачку событий: COPY для asyncpg, иначе многострочный INSERT
+    args:
+        session: AsyncSession — сессия базы данных
+        events: list[AuditEvent] - События в порядке колонок AuthEvents
+    """
+    connection = await session.connection()
+    if connection.dialect.driver == "asyncpg":
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            AuthEvent.__tablename__,
+            records=events,
+            columns=AuditEvent._fields,
+        )
+        return
+    await session.execute(insert(AuthEvent), [event._asdict() for event in events])
+
+
+async def write_audit_batch(events: list[AuditEvent]) -> None:
+    """Пишем пачку с повторными попытками; после последней неудачи она теряется"""
+    attempts = setting.audit.retry_attempts
+    for attempt in range(1, attempts + 1):
+        try:
+            async with db_helper.fabric_session() as session:
+                await insert_auth_events(session=session, events=events)
+                await session.commit()
+        except Exception:
+            if attempt >= attempts:
+                log.exception("Failed to write %s audit events", len(events))
+                audit_queue.failed += len(events)
+                return
+            log.warning("Failed to write audit events, attempt %s", attempt)
+            await asyncio.sleep(RETRY_DELAY * attempt)
+        else:
+            audit_queue.written += len(events)
+            audit_queue.batches += 1
+            return
+
+
+async def audit_flush_loop() -> None:
+    """
+    Фоновая задача: пишет события пачками по batch_size или раз
+    в flush_interval. После audit_queue.close() дописывает очередь и завершается
+    """
+    config = setting.audit
+    while True:
+        await audit_queue.wait(config.flush_interval)
+        while len(audit_queue):
+            batch = audit_queue.take(config.batch_size)
+            # Пачка уже не в очереди: если запись прервут при остановке,
+            # stop_audit посчитает ее потерянной
+            audit_queue.in_flight = len(batch)
+            await write_audit_batch(batch)
+            audit_queue.in_flight = 0
+        if not audit_queue.accepting:
+            return
+
+
+async def start_audit() -> asyncio.Task | None:
+    """
+    Открываем очередь аудита (в lifespan рабочего процесса). Секции таблицы
+    создает scripts/audit_partitions.py: DDL при запуске рабочих процессов
+    не выполняется, без секций события пишутся в AuthEvents_default
+    return:
+        task: asyncio.Task | None - Фоновая запись или None, если аудит выключен
+    """
+    if not setting.audit.enabled:
+        return None
+    if db_helper.create_engine.dialect.name != "postgresql":
+        # Секционированная таблица и COPY есть только в Postgres
+        log.warning("Audit log requires PostgreSQL, auth events are not recorded")
+        return None
+    audit_queue.open()
+    return asyncio.create_task(audit_flush_loop())
+
+
+async def stop_audit(task: asyncio.Task | None) -> None:
+    """Закрываем очередь и ждем записи оставшихся событий, не дольше shutdown_timeout"""
+    audit_queue.close()
+    if task is None:
+        return
+    try:
+        await asyncio.wait_for(task, setting.audit.shutdown_timeout)
+    except TimeoutError:
+        log.warning("Audit flush timed out, %s events lost", audit_queue.discard())
@@ -0,0 +1,295 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import setting
+from core.model import RevokedToken, User, db_helper
+from utils.denylist import (
+    profile_watermarks,
+    revoke_user_marks,
+    token_denylist,
+    user_watermarks,
+)
+from utils.metrics import timed
+from utils.revocation import revocation_filter
+from utils.user_cache import user_cache
+
+log = logging.getLogger(__name__)
+
+KIND_ROTATED = "rotated"
+KIND_FAMILY = "family"
+KIND_LOGOUT = "logout"
+
+
+def insert_revoked_stmt(session: AsyncSession):
+    """INSERT для диалекта сессии (поддерживает ON CONFLICT)"""
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(RevokedToken)
+    return postgresql.insert(RevokedToken)
+
+
+def token_ids(payload: dict) -> list[str]:
+    """Идентификаторы, по которым токен может быть отозван: jti и семейство"""
+    return [item for item in (payload.get("jti"), payload.get("fam")) if item]
+
+
+@timed("find_revocation")
+async def find_revocation(
+    session: AsyncSession,
+    payload: dict,
+) -> str | None:
+    """
+    Проверяем, отозван ли токен или его семейство
+    args:
+        session: AsyncSession — сессия базы данных
+        payload: dict - Словарь расшифрованого токена
+    return:
+        kind: str | None - Причина отзыва или None, если токен действителен
+    """
+    ids = token_ids(payload)
+    # Фильтр Блума: для неотозванных токенов запрос к базе не нужен
+    if not ids or not revocation_filter.might_contain(ids):
+        return None
+    stmt = select(RevokedToken.kind).where(RevokedToken.jti.in_(ids))
+    result = await session.scalars(stmt)
+    kinds = set(result.all())
+    # Отзыв семейства важнее: он закрывает и все токены-наследники
+    if KIND_FAMILY in kinds:
+        return KIND_FAMILY
+    return kinds.pop() if kinds else None
+
+
+@timed("find_revoked_ids")
+async def find_revoked_ids(
+    session: AsyncSession,
+    payloads: list[dict],
+) -> set[str]:
+    """
+    Отозванные идентификаторы (jti и семейства) для пачки токенов одним запросом
+    args:
+        session: AsyncSession — сессия базы данных
+        payloads: list[dict] - Словари расшифрованых токенов
+    return:
+        ids: set[str] - Идентификаторы из пачки, которые есть в таблице отзывов
+    """
+    ids = set()
+    for payload in payloads:
+        candidates = token_ids(payload)
+        # Запрашиваем базу только по тем, кого допускает фильтр Блума
+        if candidates and revocation_filter.might_contain(candidates):
+            ids.update(candidates)
+    if not ids:
+        return set()
+    stmt = select(RevokedToken.jti).where(RevokedToken.jti.in_(ids))
+    result = await session.scalars(stmt)
+    return set(result.all())
+
+
+async def revoke(
+    session: AsyncSession,
+    jti: str,
+    kind: str,
+    expires_at: datetime,
+    family: str | None = None,
+) -> bool:
+    """
+    Записываем отзыв одним INSERT ... ON CONFLICT DO NOTHING
+    args:
+        session: AsyncSession — сессия базы данных
+        jti: str - jti токена или идентификатор семейства
+        kind: str - Причина отзыва
+        expires_at: datetime - Когда запись можно удалить (exp токена)
+        family: str | None - Семейство токена
+    return:
+        bool - True, если запись создана этим вызовом
+    """
+    stmt = (
+        insert_revoked_stmt(session)
+        .values(jti=jti, kind=kind, family=family, expires_at=expires_at)
+        .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+        .returning(RevokedToken.id)
+    )
+    result = await session.execute(stmt)
+    created = result.scalar_one_or_none() is not None
+    await session.commit()
+    revocation_filter.add(jti)
+    return created
+
+
+async def consume_refresh_token(
+    session: AsyncSession,
+    payload: dict,
+) -> bool:
+    """
+    Погашаем refresh-токен при ротации.
+    Атомарно: из двух одновременных обменов одного токена успешен один.
+    Повторное использование погашенного токена отзывает все его семейство.
+    args:
+        session: AsyncSession — сессия базы данных
+        payload: dict - Словарь расшифрованого refresh токена
+    return:
+        bool - True, если токен погашен впервые
+    """
+    expires_at = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+    family = payload.get("fam") or payload["jti"]
+    consumed = await revoke(
+        session=session,
+        jti=payload["jti"],
+        kind=KIND_ROTATED,
+        expires_at=expires_at,
+        family=family,
+    )
+    if not consumed:
+        log.warning("Refresh token reuse detected, revoking family %s", family)
+        await revoke_family(session=session, family=family)
+    return consumed
+
+
+async def revoke_family(
+    session: AsyncSession,
+    family: str,
+) -> None:
+    """
+    Отзываем все семейство токенов, выданных от одного входа.
+    Запись живет, пока может существовать токен семейства.
+    """
+    expires_at = datetime.now(timezone.utc) + timedelta(
+        days=setting.auth_jwt.refresh_token_expire_days
+    )
+    await revoke(
+        session=session,
+        jti=family,
+        kind=KIND_FAMILY,
+        expires_at=expires_at,
+    )
+
+
+async def revoke_token(
+    session: AsyncSession,
+    payload: dict,
+) -> None:
+    """
+    Отзываем один токен (выход из системы) до его exp
+    args:
+        session: AsyncSession — сессия базы данных
+        payload: dict - Словарь расшифрованого токена
+    """
+    token_denylist.add(payload["jti"], payload["exp"])
+    await revoke(
+        session=session,
+        jti=payload["jti"],
+        kind=KIND_LOGOUT,
+        expires_at=datetime.fromtimestamp(payload["exp"], tz=timezone.utc),
+        family=payload.get("fam"),
+    )
+
+
+async def revoke_user_tokens(
+    session: AsyncSession,
+    user_id: int,
+) -> str | None:
+    """
+    Отзываем все токены пользователя, выданные до текущего момента
+    args:
+        session: AsyncSession — сессия базы данных
+        user_id: int - id пользователя
+    return:
+        email: str | None - Почта пользователя или None, если его нет
+    """
+    now = datetime.now(timezone.utc)
+    stmt = (
+        update(User)
+        .where(User.id == user_id)
+        .values(tokens_valid_after=now)
+        .returning(User.email)
+    )
+    email = (await session.execute(stmt)).scalar_one_or_none()
+    await session.commit()
+    if email is not None:
+        revoke_user_marks(user_id, email, now.timestamp())
+    return email
+
+
+def apply_revocations(rows) -> None:
+    for row in rows:
+        revocation_filter.add(row.jti)
+        if row.kind == KIND_LOGOUT:
+            token_denylist.add(row.jti, row.expires_at.timestamp())
+
+
+async def sync_revocations(rebuild: bool = False) -> None:
+    """
+    Подтягиваем в память отзывы из базы данных: фильтр Блума, denylist
+    и отметки пользователей. rebuild=True - удаляем истекшие записи
+    и пересобираем фильтр целиком.
+    """
+    async with db_helper.fabric_session() as session:
+        # revoked_at пишет база; расхождение часов и поздние коммиты
+        # покрывает запас sync_overlap
+        synced_at = datetime.now(timezone.utc)
+        previous_sync = revocation_filter.synced_at
+        columns = (
+            RevokedToken.jti,
+            RevokedToken.kind,
+            RevokedToken.expires_at,
+        )
+        if rebuild or revocation_filter.synced_at is None:
+            await session.execute(
+                delete(RevokedToken).where(RevokedToken.expires_at < synced_at)
+            )
+            await session.commit()
+            rows = (await session.execute(select(*columns))).all()
+            revocation_filter.rebuild(ids=[row.jti for row in rows], synced_at=None)
+            user_watermarks.purge()
+            profile_watermarks.purge()
+            since = synced_at - timedelta(seconds=user_watermarks.max_token_lifetime)
+            profile_since = synced_at - timedelta(
+                seconds=profile_watermarks.max_token_lifetime
+            )
+        else:
+            since = revocation_filter.synced_at - timedelta(
+                seconds=setting.revocation.sync_overlap
+            )
+            profile_since = since
+            stmt = select(*columns).where(RevokedToken.revoked_at >= since)
+            rows = (await session.execute(stmt)).all()
+        apply_revocations(rows)
+        stmt = select(User.id, User.email, User.tokens_valid_after).where(
+            User.tokens_valid_after >= since
+        )
+        for row in (await session.execute(stmt)).all():
+            revoke_user_marks(row.id, row.email, row.tokens_valid_after.timestamp())
+        # Профили, измененные другими процессами: claims выданных раньше
+        # токенов и снимки в кэше устарели
+        stmt = select(User.id, User.email, User.updated_at).where(
+            User.updated_at >= profile_since
+        )
+        for row in (await session.execute(stmt)).all():
+            profile_watermarks.set(str(row.id), row.updated_at.timestamp())
+            # При первой синхронизации кэш в памяти процесса еще пуст
+            if previous_sync is not None:
+                await user_cache.invalidate(row.email)
+        revocation_filter.synced_at = synced_at
+        revocation_filter.ready = True
+
+
+async def revocation_sync_loop() -> None:
+    """Фоновая задача: периодическая синхронизация и пересборка фильтра"""
+    config = setting.revocation
+    loop = asyncio.get_running_loop()
+    rebuilt_at = loop.time()
+    while True:
+        await asyncio.sleep(config.sync_interval)
+        rebuild = loop.time() - rebuilt_at >= config.rebuild_interval
+        try:
+            await sync_revocations(rebuild=rebuild)
+        except Exception:
+            log.exception("Failed to sync revoked tokens")
+            continue
+        if rebuild:
+            rebuilt_at = loop.time()
@@ -1,61 +1,440 @@
+from datetime import datetime, timezone
+from typing import AsyncIterable, AsyncIterator
+
 from fastapi import HTTPException
-from sqlalchemy import select
+from pydantic import ValidationError
+from sqlalchemy import Row, String, any_, bindparam, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from core.model import User
-from core.schema.user import UserCreate
-from utils.validates import hash_password
+from core.model import User, db_helper
+from core.schema.user import (
+    BulkUserResult,
+    UserCreate,
+    UserSnapshot,
+    UserUpdate,
+)
+from utils.denylist import profile_watermarks, revoke_user_marks
+from utils.hasher import password_hasher
+from utils.metrics import timed
+from utils.user_cache import user_cache
+
+
+# Колонки из INCLUDE индекса ix_Users_email_lower: поиск - index-only scan
+USER_LOOKUP_COLUMNS = (
+    User.id,
+    User.email,
+    User.password_hash,
+    User.name,
+    User.is_superuser,
+)
+# Запрос собирается один раз: сборка select с func.lower на каждый вход
+# стоит дороже, чем сам поиск по индексу
+USER_LOOKUP_STMT = select(*USER_LOOKUP_COLUMNS).where(
+    func.lower(User.email) == bindparam("email_key")
+)
 
 
+@timed("get_user_by_email")
 async def get_user_by_email(
     session: AsyncSession,
     email_user: str,
-) -> User:
+) -> Row | None:
     """
-    Ищем пользователя по электроной почте
+    Ищем пользователя по электроной почте без учета регистра
+    (на реплике, если они настроены; недавно записанную этим процессом
+    почту - на primary)
     args:
         session: AsyncSession — сессия базы данных
         email_user: str - электроная почта
     return:
-        user: User - Возвращаем модель User
+        user: Row | None - id, email, password_hash, name, is_superuser
+    """
+    params = {"email_key": email_user.lower()}
+    result = await session.execute(
+        USER_LOOKUP_STMT,
+        params,
+        bind_arguments={"replica": True, "replica_key": params["email_key"]},
+    )
+    # Промах на реплике не перепроверяем на primary: он удваивал бы запросы
+    # на каждую неизвестную почту и выдавал бы ее временем ответа.
+    # Свои записи процесс и так читает с primary (pin_to_primary)
+    return result.first()
+
+
+def email_in(session: AsyncSession, emails: list[str]):
+    """
+    Условие lower(email) из списка почт в нижнем регистре (индекс
+    ix_Users_email_lower). В PostgreSQL - lower(email) = ANY($1) с одним
+    параметром-массивом: один подготовленный запрос на любой размер пачки
     """
-    stmt = select(User).where(User.email == email_user)
+    if session.get_bind().dialect.name == "postgresql":
+        return func.lower(User.email) == any_(
+            bindparam("emails", emails, type_=postgresql.ARRAY(String))
+        )
+    return func.lower(User.email).in_(emails)
+
+
+@timed("get_users_by_emails")
+async def get_users_by_emails(
+    session: AsyncSession,
+    emails: list[str],
+) -> list[Row]:
+    """
+    Ищем пользователей по списку почт без учета регистра одним запросом
+    (на реплике, если они настроены; промахи на primary не перепроверяются)
+    args:
+        session: AsyncSession — сессия базы данных
+        emails: list[str] - электроные почты
+    return:
+        users: list[Row] - id, email, password_hash, name, is_superuser найденных
+    """
+    keys = list({email.lower() for email in emails})
+    if not keys:
+        return []
+    stmt = select(*USER_LOOKUP_COLUMNS).where(email_in(session, keys))
+    result = await session.execute(stmt.execution_options(replica=True))
+    return list(result.all())
+
+
+async def get_user_snapshots_by_emails(
+    session: AsyncSession,
+    emails: list[str],
+) -> dict[str, UserSnapshot]:
+    """
+    Снимки пользователей по списку почт: сначала кэш одним запросом,
+    промахи - одним запросом к базе данных
+    args:
+        session: AsyncSession — сессия базы данных
+        emails: list[str] - электроные почты
+    return:
+        users: dict[str, UserSnapshot] - Снимки найденных пользователей по почте из запроса
+    """
+    users = await user_cache.get_many(emails)
+    # Почты из запроса по ключу без учета регистра
+    missing: dict[str, list[str]] = {}
+    for email in emails:
+        if email not in users:
+            missing.setdefault(email.lower(), []).append(email)
+    for user_db in await get_users_by_emails(session=session, emails=list(missing)):
+        user = UserSnapshot.model_validate(user_db)
+        await user_cache.set(user)
+        for email in missing.get(user.email.lower(), []):
+            users[email] = user
+    return users
+
+
+async def get_existing_emails(
+    session: AsyncSession,
+    emails: list[str],
+) -> set[str]:
+    """
+    Ищем, какие из почт уже заняты (без учета регистра), одним запросом
+    args:
+        session: AsyncSession — сессия базы данных
+        emails: list[str] - электроные почты в нижнем регистре
+    return:
+        emails: set[str] - Почты (в нижнем регистре), которые уже есть в базе данных
+    """
+    if not emails:
+        return set()
+    stmt = select(func.lower(User.email)).where(email_in(session, emails))
     result = await session.scalars(stmt)
-    user = result.first()
+    return set(result.all())
+
+
+def insert_user_stmt(session: AsyncSession):
+    """INSERT для диалекта сессии (поддерживает ON CONFLICT)"""
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert(User)
+    return postgresql.insert(User)
+
+
+async def get_user_snapshot_by_email(
+    session: AsyncSession,
+    email_user: str,
+) -> UserSnapshot | None:
+    """
+    Ищем пользователя по электроной почте сначала в кэше, затем в базе данных
+    args:
+        session: AsyncSession — сессия базы данных
+        email_user: str - электроная почта
+    return:
+        user: UserSnapshot | None - Снимок пользователя (без хэша пароля)
+    """
+    user = await user_cache.get(email_user)
+    if user is not None:
+        return user
+    user_db = await get_user_by_email(session=session, email_user=email_user)
+    if not user_db:
+        return None
+    user = UserSnapshot.model_validate(user_db)
+    await user_cache.set(user)
     return user
 
 
 async def create_user(
     session: AsyncSession,
     data_user: UserCreate,
-) -> User:
+) -> UserSnapshot:
     """
-    Создаем user
+    Создаем user одним запросом INSERT ... ON CONFLICT DO NOTHING RETURNING.
+    Занятая почта отклоняется (409) до хэширования пароля
     args:
         session: AsyncSession — сессия базы данных
         data_user: UserCreate - Данные нового пользователя
     return:
-        user: User - Возвращаем модель User
+        user: UserSnapshot - Возвращаем созданного пользователя (id, email, name)
     """
-    # Ищем пользователя в базе данных на наличие
-    user = await get_user_by_email(session=session, email_user=str(data_user.email))
-    if user:
-        raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT,
-            detail=f"Invalid there is already a user with this: {data_user.email}",
+    conflict = HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Invalid there is already a user with this: {data_user.email}",
+    )
+    # Занятую почту отклоняем до хэширования: повторные регистрации
+    # не должны занимать пул bcrypt (поиск - по индексу lower(email))
+    email = str(data_user.email)
+    if await get_existing_emails(session=session, emails=[email.lower()]):
+        raise conflict
+    # Соединение не держим на время хэширования
+    await session.commit()
+    # Хэшируем пароль в пуле, не блокируя event loop
+    password_hash = await password_hasher.hash(data_user.password)
+    # Создаем пользователя; если почту заняли параллельно, строка не вернется
+    stmt = (
+        insert_user_stmt(session)
+        .values(
+            email=email,
+            password_hash=password_hash,
+            name=data_user.name,
         )
-    # Хэшируем пароль
-    hash_bytes = hash_password(data_user.password)
-    # Преобразуем пароль из байтов в строку для хранения в базе данных
-    hex_hash = hash_bytes.hex()
-    # Создаем пользователя
-    user = User(
-        email=data_user.email,
-        password_hash=hex_hash,
-        name=data_user.name,
+        # Без указания индекса: почта уникальна и без учета регистра
+        .on_conflict_do_nothing()
+        .returning(User.id, User.email, User.name, User.is_superuser)
     )
-    session.add(user)
+    row = (await session.execute(stmt)).first()
     await session.commit()
-    await session.refresh(user)
-    return user
+    if row is None:
+        raise conflict
+    db_helper.pin_to_primary(row.email.lower())
+    await user_cache.invalidate(row.email)
+    return UserSnapshot.model_validate(row)
+
+
+async def rehash_user_password(
+    user_id: int,
+    old_password_hash: str,
+    password: str,
+) -> bool:
+    """
+    Пересчитываем хэш пароля по текущей политике (вызывается после ответа,
+    в фоне, поэтому открывает свою сессию)
+    args:
+        user_id: int - id пользователя
+        old_password_hash: str - Хэш, с которым пользователь вошел
+        password: str - Проверенный пароль
+    return:
+        bool - True, если хэш обновлен
+    """
+    password_hash = await password_hasher.hash(password)
+    # Обновляем, только если хэш не поменяли параллельно
+    stmt = (
+        update(User)
+        .where(User.id == user_id, User.password_hash == old_password_hash)
+        .values(password_hash=password_hash)
+    )
+    async with db_helper.fabric_session() as session:
+        result = await session.execute(stmt)
+        await session.commit()
+    return bool(result.rowcount)
+
+
+async def update_user(
+    session: AsyncSession,
+    user: UserSnapshot,
+    data_user: UserUpdate,
+) -> UserSnapshot:
+    """
+    Обновляем user одним UPDATE ... RETURNING. Смена пароля или почты
+    завершает все прежние сессии пользователя
+    args:
+        session: AsyncSession — сессия базы данных
+        user: UserSnapshot - Пользователь, которого обновляем
+        data_user: UserUpdate - Новые данные пользователя
+    return:
+        user: UserSnapshot - Обновленный пользователь
+    """
+    values = data_user.model_dump(exclude_unset=True, exclude_none=True)
+    password = values.pop("password", None)
+    if password is not None:
+        values["password_hash"] = await password_hasher.hash(password)
+    if "email" in values:
+        values["email"] = str(values["email"])
+    if not values:
+        return user
+    now = datetime.now(timezone.utc)
+    # Остальные процессы сбросят кэш снимка при синхронизации отзывов
+    values["updated_at"] = now
+    revoked_at = None
+    if password is not None or values.get("email", user.email) != user.email:
+        revoked_at = now
+        values["tokens_valid_after"] = revoked_at
+    stmt = (
+        update(User)
+        .where(User.id == user.id)
+        .values(**values)
+        .returning(User.id, User.email, User.name, User.is_superuser)
+    )
+    try:
+        row = (await session.execute(stmt)).first()
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Invalid there is already a user with this: {values['email']}",
+        )
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Invalid user {user.id} not found",
+        )
+    # Сбрасываем кэш и по старой, и по новой почте
+    for email in {user.email, row.email}:
+        db_helper.pin_to_primary(email.lower())
+        await user_cache.invalidate(email)
+    profile_watermarks.set(str(row.id), now.timestamp())
+    if revoked_at is not None:
+        revoke_user_marks(user.id, user.email, revoked_at.timestamp())
+    return UserSnapshot.model_validate(row)
+
+
+async def create_users_chunk(
+    session: AsyncSession,
+    chunk: list[tuple[int, UserCreate]],
+) -> list[BulkUserResult]:
+    """
+    Создаем пачку пользователей одним INSERT ... RETURNING
+    args:
+        session: AsyncSession — сессия базы данных
+        chunk: list[tuple[int, UserCreate]] - Номер строки и данные пользователя
+    return:
+        results: list[BulkUserResult] - Результат по каждой строке
+    """
+    results: dict[int, BulkUserResult] = {}
+    unique: dict[str, tuple[int, UserCreate]] = {}
+    # Дубликаты внутри самой пачки (почты сравниваем без учета регистра)
+    for index, data_user in chunk:
+        email = str(data_user.email)
+        if email.lower() in unique:
+            results[index] = BulkUserResult(
+                index=index,
+                status="conflict",
+                email=email,
+                detail="Duplicate email in the same import",
+            )
+            continue
+        unique[email.lower()] = (index, data_user)
+    # Дубликаты в базе данных - одним запросом на всю пачку
+    existing = await get_existing_emails(session=session, emails=list(unique))
+    to_insert = []
+    for email_key, (index, data_user) in unique.items():
+        if email_key in existing:
+            email = str(data_user.email)
+            results[index] = BulkUserResult(
+                index=index,
+                status="conflict",
+                email=email,
+                detail=f"Invalid there is already a user with this: {email}",
+            )
+            continue
+        to_insert.append((index, data_user))
+    if to_insert:
+        # Хэшируем пароли параллельно в пуле
+        hashes = await password_hasher.hash_many(
+            [data_user.password for _, data_user in to_insert]
+        )
+        stmt = (
+            insert_user_stmt(session)
+            .values(
+                [
+                    {
+                        "email": str(data_user.email),
+                        "password_hash": password_hash,
+                        "name": data_user.name,
+                    }
+                    for (_, data_user), password_hash in zip(to_insert, hashes)
+                ]
+            )
+            .on_conflict_do_nothing()
+            .returning(User.id, User.email)
+        )
+        rows = (await session.execute(stmt)).all()
+        await session.commit()
+        created = {row.email: row.id for row in rows}
+        for index, data_user in to_insert:
+            email = str(data_user.email)
+            user_id = created.get(email)
+            if user_id is None:
+                # Пользователя успели создать параллельно
+                results[index] = BulkUserResult(
+                    index=index,
+                    status="conflict",
+                    email=email,
+                    detail=f"Invalid there is already a user with this: {email}",
+                )
+                continue
+            results[index] = BulkUserResult(
+                index=index,
+                status="created",
+                email=email,
+                id=user_id,
+            )
+            db_helper.pin_to_primary(email.lower())
+            await user_cache.invalidate(email)
+    return [results[index] for index in sorted(results)]
+
+
+async def create_users_bulk(
+    session: AsyncSession,
+    lines: AsyncIterable[str | bytes],
+    chunk_size: int = 1000,
+) -> AsyncIterator[BulkUserResult]:
+    """
+    Массовая регистрация из потока JSON-строк (NDJSON) по пачкам,
+    чтобы расход памяти не зависел от размера импорта
+    args:
+        session: AsyncSession — сессия базы данных
+        lines: AsyncIterable[str | bytes] - Поток строк, одна строка - один UserCreate
+        chunk_size: int - Размер пачки
+    return:
+        results: AsyncIterator[BulkUserResult] - Результат по каждой строке
+    """
+    chunk: list[tuple[int, UserCreate]] = []
+    index = -1
+    async for line in lines:
+        if not line.strip():
+            continue
+        index += 1
+        try:
+            data_user = UserCreate.model_validate_json(line)
+        except ValidationError as exc:
+            yield BulkUserResult(
+                index=index,
+                status="invalid",
+                detail="; ".join(
+                    f"{'.'.join(map(str, error['loc'])) or 'line'}: {error['msg']}"
+                    for error in exc.errors(include_url=False, include_input=False)
+                ),
+            )
+            continue
+        chunk.append((index, data_user))
+        if len(chunk) >= chunk_size:
+            for result in await create_users_chunk(session=session, chunk=chunk):
+                yield result
+            chunk = []
+    if chunk:
+        for result in await create_users_chunk(session=session, chunk=chunk):
+            yield result
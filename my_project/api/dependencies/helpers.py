@@ -1,38 +1,53 @@
+import uuid
 from datetime import datetime, timezone, timedelta
 
+from sqlalchemy import Row
+
 from core.config import setting
 from core.model import User
-from utils.validates import encode_jwt
+from core.schema.user import UserSnapshot
+from utils.keys import key_manager
+from utils.validates import Signer
 
 
 def create_token(
     type_payload: str,
     payload: dict,
-    private_key: str = setting.auth_jwt.private_key_path.read_text(),
-    algorithm: str = setting.auth_jwt.algorithm,
-    expire_minutes: int = setting.auth_jwt.access_token_expire_minutes,
+    signer: Signer | None = None,
+    expire_minutes: int | None = None,
     expire_timedelta: timedelta | None = None,
 ):
     type_token = setting.auth_jwt.type_payload
     type_payload = {type_token: type_payload}
     type_payload.update(payload)
-    return encode_jwt(
+    # Подписываем активным ключом, kid попадает в заголовок токена
+    if signer is None:
+        signer = key_manager.signer
+    if expire_minutes is None:
+        expire_minutes = setting.auth_jwt.access_token_expire_minutes
+    return signer.encode(
         payload=type_payload,
-        private_key=private_key,
-        algorithm=algorithm,
         expire_minutes=expire_minutes,
         expire_timedelta=expire_timedelta,
     )
 
 
-def create_access_token(user: User):
+def new_token_family() -> str:
+    """Семейство - все токены, выданные от одного входа через ротацию"""
+    return str(uuid.uuid4())
+
+
+def create_access_token(user: User | UserSnapshot | Row, family: str | None = None):
     now = datetime.now(timezone.utc)
     jwt_payload = {
         "sub": user.email,
+        "uid": user.id,
         "email": user.email,
         "name": user.name,
         "logged_in_at": now.isoformat(),
     }
+    if family:
+        jwt_payload["fam"] = family
     type_payload = setting.auth_jwt.type_access
     return create_token(
         type_payload=type_payload,
@@ -40,9 +55,11 @@ def create_access_token(user: User):
     )
 
 
-def create_refresh_token(user: User):
+def create_refresh_token(user: User | UserSnapshot | Row, family: str | None = None):
     jwt_payload = {
         "sub": user.email,
+        "uid": user.id,
+        "fam": family or new_token_family(),
     }
     type_payload = setting.auth_jwt.type_refresh
     expire_timedelta = timedelta(days=setting.auth_jwt.refresh_token_expire_days)
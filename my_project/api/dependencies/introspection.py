@@ -0,0 +1,86 @@
+import hmac
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.CRUD.crud_token import find_revoked_ids, token_ids
+from api.CRUD.crud_user import get_user_snapshots_by_emails
+from core.config import setting
+from core.schema.introspection import IntrospectResult
+from utils.denylist import token_denylist, user_watermarks, watermark_key
+from utils.introspection import token_verifier
+
+INACTIVE = IntrospectResult.model_construct(active=False)
+
+
+def check_api_key(api_key: str | None) -> None:
+    """
+    Проверяем ключ шлюза. Сравниваем за постоянное время со всеми ключами
+    args:
+        api_key: str | None - Значение заголовка X-API-Key
+    """
+    valid = False
+    if api_key:
+        for key in setting.introspection.api_keys:
+            valid |= hmac.compare_digest(
+                api_key.encode(), key.get_secret_value().encode()
+            )
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid API key",
+        )
+
+
+async def introspect_tokens(
+    session: AsyncSession,
+    tokens: list[str],
+) -> list[IntrospectResult]:
+    """
+    Проверяем пачку токенов: подписи - в пуле, отзывы - в памяти и одним
+    запросом по кандидатам фильтра Блума, пользователи - из кэша и одним
+    запросом lower(email) = ANY(...). Интроспекция только читает: повторное
+    предъявление обменянного refresh-токена здесь семейство не отзывает
+    args:
+        session: AsyncSession — сессия базы данных
+        tokens: list[str] - Токены
+    return:
+        results: list[IntrospectResult] - Результат по каждому токену в порядке запроса
+    """
+    # Одинаковые токены в пачке проверяем один раз
+    unique = list(dict.fromkeys(tokens))
+    payloads = dict(zip(unique, await token_verifier.verify_many(unique)))
+    active = {
+        token: payload
+        for token, payload in payloads.items()
+        if payload is not None
+        and not user_watermarks.is_revoked(watermark_key(payload), payload.get("iat"))
+        and not token_denylist.contains(payload.get("jti"), payload.get("exp", 0))
+    }
+    revoked = await find_revoked_ids(session=session, payloads=list(active.values()))
+    if revoked:
+        active = {
+            token: payload
+            for token, payload in active.items()
+            if revoked.isdisjoint(token_ids(payload))
+        }
+    users = await get_user_snapshots_by_emails(
+        session=session,
+        emails=list({payload["sub"] for payload in active.values()}),
+    )
+    results = {}
+    for token, payload in active.items():
+        user = users.get(payload["sub"])
+        if user is None:
+            continue
+        results[token] = IntrospectResult.model_construct(
+            active=True,
+            token_type=payload.get(setting.auth_jwt.type_payload),
+            sub=payload["sub"],
+            username=user.email,
+            user_id=user.id,
+            exp=payload.get("exp"),
+            iat=payload.get("iat"),
+            jti=payload.get("jti"),
+        )
+    return [results.get(token, INACTIVE) for token in tokens]
@@ -1,18 +1,47 @@
 from typing import Optional, Tuple
 
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import status, HTTPException
+from fastapi import BackgroundTasks, status, HTTPException
 from fastapi.security import (
     OAuth2PasswordBearer,
     HTTPBearer,
     OAuth2PasswordRequestForm,
 )
+import jwt
 from jwt.exceptions import InvalidTokenError
 
-from api.CRUD.crud_user import get_user_by_email
+from api.CRUD.crud_token import (
+    KIND_LOGOUT,
+    KIND_ROTATED,
+    consume_refresh_token,
+    find_revocation,
+    revoke_family,
+)
+from api.CRUD.crud_user import (
+    get_user_by_email,
+    get_user_snapshot_by_email,
+    rehash_user_password,
+)
 from core.config import setting
-from core.model import User
-from utils.validates import validates_password, decode_jwt
+from core.schema.user import UserSnapshot
+from utils.denylist import (
+    profile_watermarks,
+    token_denylist,
+    user_watermarks,
+    watermark_key,
+)
+from utils.hasher import password_hasher
+from utils.keys import key_manager
+from utils.metrics import registry
+from utils.token_cache import token_cache
+from utils.validates import password_needs_rehash
+
+USER_RESOLVED = registry.counter(
+    "auth_user_resolved",
+    "Users resolved for token-authenticated requests",
+    ("source",),
+)
 
 conn = HTTPBearer()
 oauth2_scheme = OAuth2PasswordBearer(
@@ -23,14 +52,16 @@ oauth2_scheme = OAuth2PasswordBearer(
 async def auth_user(
     data_user: OAuth2PasswordRequestForm,
     session: AsyncSession,
-) -> User:
+    background_tasks: BackgroundTasks | None = None,
+) -> Row:
     """
     Проверяем user
     args:
         data_user: OAuth2PasswordRequestForm - Получаем user из формы
         session: AsyncSession — сессия базы данных
+        background_tasks: BackgroundTasks | None - Фоновые задачи для пересчета хэша
     return:
-        user: User - Возвращаем модель User
+        user: Row - id, email, password_hash, name, is_superuser
     """
     error_ex = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -39,14 +70,31 @@ async def auth_user(
     # Ищем пользователя в базе данных
     user = await get_user_by_email(session=session, email_user=str(data_user.username))
     if not user:
+        # Неизвестная почта отвечает так же долго, как неверный пароль
+        await password_hasher.verify_dummy(
+            password=data_user.password,
+            mode=setting.hashing.unknown_user,
+        )
         raise error_ex
-    # Сравниваем пароль
-    user_password = validates_password(
+    # Сравниваем пароль в пуле, не блокируя event loop
+    user_password = await password_hasher.verify(
         password=data_user.password,
         password_hash=user.password_hash,
     )
     if not user_password:
         raise error_ex
+    # Хэш со старыми параметрами пересчитываем после отправки ответа
+    if (
+        background_tasks is not None
+        and setting.hashing.rehash_on_login
+        and password_needs_rehash(user.password_hash)
+    ):
+        background_tasks.add_task(
+            rehash_user_password,
+            user_id=user.id,
+            old_password_hash=user.password_hash,
+            password=data_user.password,
+        )
     return user
 
 
@@ -88,84 +136,231 @@ async def validate_payload(
         detail="Invalid token",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    # Токен уже проверялся ранее - повторная проверка подписи не нужна
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
     try:
-        # Расшифровываем токен
-        payload = decode_jwt(
-            token=token,
-            public_key=setting.auth_jwt.public_key_path.read_text(),
-            algorithm=setting.auth_jwt.algorithm,
-        )
+        # Выбираем ключ проверки по kid из заголовка и расшифровываем токен
+        kid = jwt.get_unverified_header(token).get("kid")
+        payload = key_manager.get_verifier(kid).decode(token)
         user_email = payload.get("sub")
         # Проверяем на наличие поля
         if not user_email:
             raise error_ex
     except InvalidTokenError:
         raise error_ex
+    token_cache.set(token, payload)
     return payload
 
 
-async def get_user_payload_syb(
+async def ensure_not_revoked(
     session: AsyncSession,
-    token: str,
+    payload: dict,
+) -> None:
+    """
+    Отклоняем отозванный токен.
+    Отметка пользователя и denylist проверяются в памяти, затем фильтр Блума;
+    к базе данных обращаемся, только если фильтр допускает отзыв.
+    Предъявление уже обменянного refresh-токена - признак утечки:
+    отзываем все семейство, включая выданные после него токены.
+    args:
+        session: AsyncSession — сессия базы данных
+        payload: dict - Словарь расшифрованого токена
+    """
+    if user_watermarks.is_revoked(watermark_key(payload), payload.get("iat")):
+        kind = KIND_LOGOUT
+    elif token_denylist.contains(payload.get("jti"), payload.get("exp", 0)):
+        kind = KIND_LOGOUT
+    else:
+        kind = await find_revocation(session=session, payload=payload)
+    if kind is None:
+        return
+    if kind == KIND_ROTATED:
+        await revoke_family(
+            session=session,
+            family=payload.get("fam") or payload["jti"],
+        )
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token has been revoked",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def user_from_claims(payload: dict) -> UserSnapshot | None:
+    """
+    Снимок пользователя из проверенных claims access токена.
+    is_superuser в токен не попадает - права проверяются только по базе
+    args:
+        payload: dict - Словарь расшифрованого токена
+    return:
+        user: UserSnapshot | None - None, если в токене нет нужных claims (старый токен)
+    """
+    user_id = payload.get("uid")
+    name = payload.get("name")
+    if user_id is None or name is None:
+        return None
+    return UserSnapshot.model_construct(
+        id=user_id,
+        email=payload["sub"],
+        name=name,
+        is_superuser=False,
+    )
+
+
+async def resolve_payload_user(
+    session: AsyncSession,
+    payload: dict,
     token_type: str,
-) -> Optional[Tuple[User, dict]]:
+    stateless: bool = False,
+) -> UserSnapshot:
     """
-    Получение access токена
+    Пользователь проверенного токена
     args:
         session: AsyncSession — сессия базы данных
-        token: str — токен для проверки
+        payload: dict - Словарь расшифрованого токена
         token_type: str - Тип(type) токена
+        stateless: bool - Маршрут согласен на пользователя из claims без запроса
+            к базе: отзыв всех сессий пользователя доходит до других процессов
+            через синхронизацию (revocation.sync_interval); после смены
+            профиля токены, выданные раньше, читают пользователя из базы
     return:
-        user_result, payload: Optional[Tuple[User, dict]] - Получаем пользователя и словарь расшифрованого токена
+        user_result: UserSnapshot - Пользователь токена
     """
-    # Проверяем токен расшифровав
-    payload = await validate_payload(token=token)
     user_email = payload.get("sub")
     # Проверяем на валидность типа токена
     validate_type_token(token_type=token_type, payload=payload)
-    # Ищем пользователя в базе данных
-    user_result = await get_user_by_email(session=session, email_user=user_email)
+    # Проверяем, не отозван ли токен (без запроса к БД, если не отзывался)
+    await ensure_not_revoked(session=session, payload=payload)
+    if (
+        stateless
+        and setting.auth_jwt.stateless_validation
+        and not profile_watermarks.is_revoked(
+            str(payload.get("uid")), payload.get("iat")
+        )
+    ):
+        user_result = user_from_claims(payload)
+        if user_result is not None:
+            USER_RESOLVED.inc("claims")
+            return user_result
+    USER_RESOLVED.inc("database")
+    # Ищем пользователя в кэше, при промахе - в базе данных
+    user_result = await get_user_snapshot_by_email(
+        session=session,
+        email_user=user_email,
+    )
     if not user_result:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Invalid {user_email} not found",
         )
+    return user_result
+
+
+async def get_user_payload_syb(
+    session: AsyncSession,
+    token: str,
+    token_type: str,
+    stateless: bool = False,
+) -> Optional[Tuple[UserSnapshot, dict]]:
+    """
+    Получение access токена
+    args:
+        session: AsyncSession — сессия базы данных
+        token: str — токен для проверки
+        token_type: str - Тип(type) токена
+        stateless: bool - см. resolve_payload_user
+    return:
+        user_result, payload: Optional[Tuple[UserSnapshot, dict]] - Получаем пользователя и словарь расшифрованого токена
+    """
+    # Проверяем токен расшифровав
+    payload = await validate_payload(token=token)
+    user_result = await resolve_payload_user(
+        session=session,
+        payload=payload,
+        token_type=token_type,
+        stateless=stateless,
+    )
     return user_result, payload
 
 
 async def get_user_token(
     session: AsyncSession,
     token: str,
-) -> Optional[Tuple[User, dict]]:
+    stateless: bool = False,
+) -> Optional[Tuple[UserSnapshot, dict]]:
     """
     Получение access токена
     args:
         session: AsyncSession — сессия базы данных
         token: str — токен для проверки
+        stateless: bool - Пользователь из claims без запроса к базе
     return:
-        user_result, payload: user_result, payload: Optional[Tuple[User, dict]] - Получаем пользователя и словарь расшифрованого токена
+        user_result, payload: user_result, payload: Optional[Tuple[UserSnapshot, dict]] - Получаем пользователя и словарь расшифрованого токена
     """
     access_type = setting.auth_jwt.type_access
     return await get_user_payload_syb(
         session=session,
         token=token,
         token_type=access_type,
+        stateless=stateless,
     )
 
 
 async def get_user_refresh_token(
     session: AsyncSession,
     token: str,
-) -> Optional[Tuple[User, dict]]:
+) -> Optional[Tuple[UserSnapshot, dict]]:
     """
-    Получение refresh токена
+    Получение refresh токена. Токен погашается: повторно обменять его нельзя.
+    Если подпись токена верна, его claims есть в HTTPException.payload
     args:
         session: AsyncSession — сессия базы данных
         token: str — токен для проверки
     return:
-        user_result, payload: Optional[Tuple[User, dict]] - Получаем пользователя и словарь расшифрованого токена
+        user_result, payload: Optional[Tuple[UserSnapshot, dict]] - Получаем пользователя и словарь расшифрованого токена
     """
-    refresh_type = setting.auth_jwt.type_refresh
-    return await get_user_payload_syb(
-        session=session, token=token, token_type=refresh_type
-    )
+    payload = await validate_payload(token=token)
+    try:
+        user_result = await resolve_payload_user(
+            session=session,
+            payload=payload,
+            token_type=setting.auth_jwt.type_refresh,
+        )
+        # Токен без jti выдан до ротации - погасить его нельзя
+        if not payload.get("jti") or not await consume_refresh_token(
+            session=session,
+            payload=payload,
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    except HTTPException as exc:
+        # Подпись проверена: claims отклоненного токена - для журнала аудита
+        exc.payload = payload
+        raise
+    return user_result, payload
+
+
+async def get_admin_user(
+    session: AsyncSession,
+    token: str,
+) -> UserSnapshot:
+    """
+    Получение администратора по access токену
+    args:
+        session: AsyncSession — сессия базы данных
+        token: str — токен для проверки
+    return:
+        user_result: UserSnapshot - Администратор
+    """
+    user_result, _ = await get_user_token(session=session, token=token)
+    if not user_result.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough privileges",
+        )
+    return user_result
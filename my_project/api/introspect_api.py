@@ -0,0 +1,41 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Security
+from fastapi.security import APIKeyHeader
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.dependencies.introspection import check_api_key, introspect_tokens
+from core.model import db_helper
+from core.schema.introspection import IntrospectRequest, IntrospectResponse
+from utils.responses import ModelResponse
+
+api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
+
+router = APIRouter(prefix="/auth", tags=["Introspection"])
+
+
+@router.post(
+    "/introspect/",
+    response_model=IntrospectResponse,
+    response_model_exclude_none=True,
+)
+async def introspect(
+    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    api_key: Annotated[str | None, Security(api_key_header)],
+    data: IntrospectRequest,
+) -> ModelResponse:
+    """
+    Пакетная интроспекция токенов для шлюзов (RFC 7662)
+    args:
+        session: AsyncSession — сессия базы данных
+        api_key: str | None - Ключ шлюза из заголовка X-API-Key
+        data: IntrospectRequest - Токены
+    return:
+        ModelResponse - active и claims по каждому токену в порядке запроса
+    """
+    check_api_key(api_key)
+    results = await introspect_tokens(session=session, tokens=data.tokens)
+    return ModelResponse(
+        IntrospectResponse.model_construct(results=results),
+        exclude_none=True,
+    )
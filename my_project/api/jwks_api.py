@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Request, Response, status
+
+from core.config import setting
+from utils.keys import key_manager
+
+router = APIRouter(tags=["JWKS"])
+
+
+@router.get("/.well-known/jwks.json")
+async def get_jwks(request: Request) -> Response:
+    """
+    Публичные ключи для локальной проверки токенов другими сервисами.
+    Документ собран заранее, повторный запрос с If-None-Match получает 304.
+    args:
+        request: Request - Запрос (нужен заголовок If-None-Match)
+    return:
+        Response - JWKS-документ
+    """
+    body, etag = key_manager.jwks()
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={setting.auth_jwt.jwks_max_age}",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(
+        content=body,
+        media_type="application/jwk-set+json",
+        headers=headers,
+    )
@@ -0,0 +1,95 @@
+import time
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.model import db_helper
+from utils.audit import audit_queue
+from utils.denylist import profile_watermarks, token_denylist, user_watermarks
+from utils.hasher import password_hasher
+from utils.introspection import token_verifier
+from utils.metrics import REQUEST_LATENCY, gauges, registry
+from utils.rate_limit import login_limiter
+from utils.revocation import revocation_filter
+from utils.startup import startup_profiler
+from utils.token_cache import token_cache
+from utils.user_cache import user_cache
+
+router = APIRouter(tags=["Metrics"])
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: время ответа по шаблону маршрута (не по сырому пути,
+    чтобы не раздувать число серий)
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - start,
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                str(status_code),
+            )
+
+
+def collect_pools() -> list[str]:
+    return [
+        *gauges("db_pool", "Database connection pool", db_helper.pool_stats()),
+        *gauges("hashing_pool", "Password hashing pool", password_hasher.stats()),
+        *gauges("token_cache", "Verified token cache", token_cache.stats()),
+        *gauges(
+            "introspection_pool",
+            "Token signature verification pool",
+            token_verifier.stats(),
+        ),
+        *gauges("user_cache", "User snapshot cache", user_cache.stats()),
+        *gauges("login_limiter", "Login rate limiter", login_limiter.stats()),
+        *gauges(
+            "revocation_filter",
+            "Revoked token Bloom filter",
+            revocation_filter.stats(),
+        ),
+        *gauges("token_denylist", "Revoked token denylist", token_denylist.stats()),
+        *gauges(
+            "user_watermarks", "Per-user revocation marks", user_watermarks.stats()
+        ),
+        *gauges(
+            "profile_watermarks",
+            "Per-user profile change marks",
+            profile_watermarks.stats(),
+        ),
+        *gauges("startup", "Worker startup timings", startup_profiler.stats()),
+        *gauges("audit", "Auth audit event pipeline", audit_queue.stats()),
+    ]
+
+
+registry.add_collector(collect_pools)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -1,19 +1,52 @@
+import math
+import time
 from typing import Annotated
-from fastapi import APIRouter, Depends, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
 from fastapi.security import OAuth2PasswordRequestForm, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from api.dependencies.user_token import (
     auth_user,
+    get_admin_user,
     get_user_token,
     get_user_refresh_token,
 )
-from api.CRUD.crud_user import create_user
-from api.dependencies.helpers import create_access_token, create_refresh_token
+from api.CRUD.crud_token import revoke_family, revoke_token, revoke_user_tokens
+from api.CRUD.crud_user import create_user, create_users_bulk, update_user
+from api.dependencies.helpers import (
+    create_access_token,
+    create_refresh_token,
+    new_token_family,
+)
 from core.config import setting
 from core.model import db_helper
 from core.schema.token import TokenBase
-from core.schema.user import UserCreate, UserRead
+from core.schema.user import (
+    BulkRegisterReport,
+    UserCreate,
+    UserMe,
+    UserRead,
+    UserUpdate,
+)
+from utils.audit import (
+    EVENT_LOGIN,
+    EVENT_REFRESH,
+    OUTCOME_FAILURE,
+    OUTCOME_SUCCESS,
+    OUTCOME_THROTTLED,
+    audit_queue,
+)
+from utils.ndjson import iter_lines, limit_bytes
+from utils.rate_limit import login_limiter
+from utils.responses import ModelResponse
 
 http_bearer = HTTPBearer(auto_error=False)
 
@@ -32,9 +65,62 @@ router = APIRouter(
 async def register_user(
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
     data_user: UserCreate,
-) -> UserRead:
+) -> ModelResponse:
     user = await create_user(session=session, data_user=data_user)
-    return UserRead.model_validate(user)
+    # Снимок уже проверен - собираем ответ без повторной валидации
+    return ModelResponse(
+        UserRead.model_construct(id=user.id, email=user.email, name=user.name),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+@router.post(
+    "/register/bulk/",
+    response_model=BulkRegisterReport,
+    response_model_exclude_none=True,
+)
+async def register_users_bulk(
+    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    request: Request,
+    chunk_size: Annotated[int, Query(ge=1, le=5000)] = 1000,
+    data_user: str = Depends(setting.auth_jwt.oauth2_scheme),
+) -> BulkRegisterReport:
+    # Импорт тратит много CPU на хэширование - только для администраторов
+    await get_admin_user(session=session, token=data_user)
+    config = setting.bulk_register
+    try:
+        content_length = int(request.headers.get("content-length") or 0)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid Content-Length header",
+        )
+    if content_length > config.max_body_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Request body is larger than {config.max_body_bytes} bytes",
+        )
+    # Тело запроса - NDJSON: одна строка - один UserCreate.
+    # Тело читается потоком, успешные строки считаются, а не копятся в памяти,
+    # проблемные перечисляются до max_report_rows
+    report = BulkRegisterReport()
+    async for result in create_users_bulk(
+        session=session,
+        lines=iter_lines(limit_bytes(request.stream(), config.max_body_bytes)),
+        chunk_size=chunk_size,
+    ):
+        if result.status == "created":
+            report.created += 1
+            continue
+        if result.status == "conflict":
+            report.conflicts_total += 1
+            rows = report.conflicts
+        else:
+            report.invalid_total += 1
+            rows = report.invalid
+        if len(report.conflicts) + len(report.invalid) < config.max_report_rows:
+            rows.append(result)
+    return ModelResponse(report, exclude_none=True)
 
 
 @router.post(
@@ -43,29 +129,106 @@ async def register_user(
 )
 async def login(
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    request: Request,
+    background_tasks: BackgroundTasks,
     data_user: OAuth2PasswordRequestForm = Depends(),
 ):
-    user = await auth_user(session=session, data_user=data_user)
-    access_token = create_access_token(user=user)
-    refresh_token = create_refresh_token(user=user)
-    return TokenBase(
-        access_token=access_token,
-        refresh_token=refresh_token,
+    started = time.perf_counter()
+    # Лимит проверяется до bcrypt: отклоненная попытка не тратит CPU
+    client_ip = request.client.host if request.client else "unknown"
+    retry_after = await login_limiter.check(ip=client_ip, account=data_user.username)
+    if retry_after:
+        audit_queue.record(
+            EVENT_LOGIN,
+            OUTCOME_THROTTLED,
+            started=started,
+            username=data_user.username,
+            ip=client_ip,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+    try:
+        user = await auth_user(
+            session=session,
+            data_user=data_user,
+            background_tasks=background_tasks,
+        )
+    except HTTPException as exc:
+        if exc.status_code == status.HTTP_401_UNAUTHORIZED:
+            await login_limiter.record_failure(ip=client_ip, account=data_user.username)
+        audit_queue.record(
+            EVENT_LOGIN,
+            OUTCOME_FAILURE,
+            started=started,
+            username=data_user.username,
+            ip=client_ip,
+            reason=exc.detail,
+        )
+        raise
+    await login_limiter.record_success(ip=client_ip, account=data_user.username)
+    family = new_token_family()
+    access_token = create_access_token(user=user, family=family)
+    refresh_token = create_refresh_token(user=user, family=family)
+    # Событие только ставится в очередь: в базу его пишет фоновая задача
+    audit_queue.record(
+        EVENT_LOGIN,
+        OUTCOME_SUCCESS,
+        started=started,
+        user_id=user.id,
+        username=user.email,
+        ip=client_ip,
+        family=family,
+    )
+    return ModelResponse(
+        TokenBase.model_construct(
+            access_token=access_token,
+            refresh_token=refresh_token,
+        )
     )
 
 
-@router.get("/me/")
+@router.get(
+    "/me/",
+    response_model=UserMe,
+)
 async def user_me(
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
     payload: str = Depends(setting.auth_jwt.oauth2_scheme),
 ):
-    user, payload_user = await get_user_token(session=session, token=payload)
+    # Ответ целиком из claims: база нужна, только если токен выдан до uid-claim
+    user, payload_user = await get_user_token(
+        session=session,
+        token=payload,
+        stateless=True,
+    )
     logged_in_at = payload_user.get("logged_in_at")
-    return {
-        "email": user.email,
-        "name": user.name,
-        "logged_in_at": logged_in_at,
-    }
+    return ModelResponse(
+        UserMe.model_construct(
+            email=user.email,
+            name=user.name,
+            logged_in_at=logged_in_at,
+        )
+    )
+
+
+@router.patch(
+    "/me/",
+    response_model=UserRead,
+)
+async def update_user_me(
+    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    data_user: UserUpdate,
+    payload: str = Depends(setting.auth_jwt.oauth2_scheme),
+) -> ModelResponse:
+    # Профиль меняем по пользователю из базы данных, а не из claims
+    user, _ = await get_user_token(session=session, token=payload)
+    user = await update_user(session=session, user=user, data_user=data_user)
+    return ModelResponse(
+        UserRead.model_construct(id=user.id, email=user.email, name=user.name)
+    )
 
 
 @router.post(
@@ -75,12 +238,79 @@ async def user_me(
 )
 async def refresh_jwt_token(
     session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    request: Request,
     data_user: str = Depends(setting.auth_jwt.oauth2_scheme),
 ):
-    user, payload = await get_user_refresh_token(session=session, token=data_user)
-    access_token = create_access_token(user=user)
-    refresh_token = create_refresh_token(user=user)
-    return TokenBase(
-        access_token=access_token,
-        refresh_token=refresh_token,
+    started = time.perf_counter()
+    client_ip = request.client.host if request.client else "unknown"
+    try:
+        user, payload = await get_user_refresh_token(session=session, token=data_user)
+    except HTTPException as exc:
+        # У токена с неверной подписью claims нет: им нельзя доверять
+        claims = getattr(exc, "payload", {})
+        audit_queue.record(
+            EVENT_REFRESH,
+            OUTCOME_FAILURE,
+            started=started,
+            user_id=claims.get("uid"),
+            username=claims.get("sub"),
+            ip=client_ip,
+            jti=claims.get("jti"),
+            family=claims.get("fam"),
+            reason=exc.detail,
+        )
+        raise
+    # Ротация: старый refresh-токен погашен, новые остаются в его семействе
+    family = payload.get("fam") or payload["jti"]
+    access_token = create_access_token(user=user, family=family)
+    refresh_token = create_refresh_token(user=user, family=family)
+    audit_queue.record(
+        EVENT_REFRESH,
+        OUTCOME_SUCCESS,
+        started=started,
+        user_id=user.id,
+        username=user.email,
+        ip=client_ip,
+        jti=payload["jti"],
+        family=family,
     )
+    return ModelResponse(
+        TokenBase.model_construct(
+            access_token=access_token,
+            refresh_token=refresh_token,
+        ),
+        exclude_none=True,
+    )
+
+
+@router.post(
+    "/logout/",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def logout(
+    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    data_user: str = Depends(setting.auth_jwt.oauth2_scheme),
+) -> None:
+    _, payload = await get_user_token(session=session, token=data_user, stateless=True)
+    # Отзываем access токен и все refresh токены этого входа
+    await revoke_token(session=session, payload=payload)
+    if payload.get("fam"):
+        await revoke_family(session=session, family=payload["fam"])
+
+
+@router.post(
+    "/users/{user_id}/revoke-sessions/",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def revoke_user_sessions(
+    session: Annotated[AsyncSession, Depends(db_helper.session_getter)],
+    user_id: int,
+    data_user: str = Depends(setting.auth_jwt.oauth2_scheme),
+) -> None:
+    await get_admin_user(session=session, token=data_user)
+    email = await revoke_user_tokens(session=session, user_id=user_id)
+    if email is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Invalid user {user_id} not found",
+        )
@@ -0,0 +1,94 @@
+"""
+Время хэширования и проверки пароля на разных уровнях стоимости
+
+    python -m benchmarks.bench_hash_cost --bcrypt-rounds 10,11,12,13 --output cost.json
+
+argon2 замеряется, только если установлен argon2-cffi.
+"""
+
+import argparse
+from pathlib import Path
+from typing import Callable
+
+from benchmarks.common import measure, write_results
+from utils.validates import (
+    Argon2Hasher,
+    argon2_hash,
+    bcrypt_hash,
+    scrypt_hash,
+    validates_password,
+)
+
+PASSWORD = "correct horse battery staple"
+
+
+def int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(",") if item]
+
+
+def bench_scheme(
+    results: dict[str, dict],
+    name: str,
+    make_hash: Callable[[], str],
+    iterations: int,
+) -> None:
+    password_hash = make_hash()
+    results[f"{name} hash"] = measure(make_hash, iterations, warmup=1)
+    results[f"{name} verify"] = measure(
+        lambda: validates_password(PASSWORD, password_hash),
+        iterations,
+        warmup=1,
+    )
+
+
+def run(args: argparse.Namespace) -> dict[str, dict]:
+    results: dict[str, dict] = {}
+    for rounds in args.bcrypt_rounds:
+        bench_scheme(
+            results,
+            f"bcrypt rounds={rounds}",
+            lambda: bcrypt_hash(PASSWORD, rounds=rounds),
+            args.iterations,
+        )
+    for log_n in args.scrypt_log_n:
+        bench_scheme(
+            results,
+            f"scrypt n=2^{log_n}",
+            lambda: scrypt_hash(PASSWORD, n=2**log_n, r=8, p=1),
+            args.iterations,
+        )
+    if Argon2Hasher is not None:
+        for time_cost in args.argon2_time_cost:
+            bench_scheme(
+                results,
+                f"argon2 t={time_cost}",
+                lambda: argon2_hash(
+                    PASSWORD,
+                    time_cost=time_cost,
+                    memory_cost=65536,
+                    parallelism=4,
+                ),
+                args.iterations,
+            )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Password hashing cost levels")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--bcrypt-rounds", type=int_list, default=[10, 11, 12, 13])
+    parser.add_argument("--scrypt-log-n", type=int_list, default=[14, 15, 16])
+    parser.add_argument("--argon2-time-cost", type=int_list, default=[2, 3, 4])
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    write_results(
+        suite="hash_cost",
+        params={
+            "iterations": args.iterations,
+            "bcrypt_rounds": args.bcrypt_rounds,
+            "scrypt_log_n": args.scrypt_log_n,
+            "argon2_time_cost": args.argon2_time_cost,
+        },
+        results=run(args),
+        output=args.output,
+    )
@@ -0,0 +1,217 @@
+"""
+Нагрузочный прогон эндпоинтов /auth/* внутри процесса (ASGI, без сети)
+
+    python -m benchmarks.bench_http \
+        --db-url sqlite+aiosqlite:///bench.db --create-schema \
+        --users 500 --requests 2000 --concurrency 50 --output http.json
+
+--db-url можно направить на локальный Postgres (postgresql+asyncpg://...),
+тогда схема должна быть создана миграциями или флагом --create-schema.
+Нужен httpx (и aiosqlite для SQLite).
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from benchmarks.common import summarize, write_results
+
+try:
+    import httpx
+except ImportError:  # httpx - зависимость только для бенчмарков
+    httpx = None
+
+from sqlalchemy import insert
+
+from core.model import Base, User, db_helper
+from core.model.helpers_db import DatabaseHelper
+from main import app_main
+from utils.validates import hash_password
+
+PASSWORD = "bench-password"
+ENDPOINTS = ("register", "login", "me", "refresh")
+
+Request = Callable[["httpx.AsyncClient", int, dict], Awaitable["httpx.Response"]]
+
+
+async def use_database(url: str, pool_size: int, create_schema: bool) -> None:
+    """Подменяем движок приложения на тестовую базу данных"""
+    helper = DatabaseHelper(
+        url=url,
+        echo=False,
+        pool_size=pool_size,
+        max_overflow=pool_size,
+    )
+    db_helper.create_engine = helper.create_engine
+    db_helper.fabric_session = helper.fabric_session
+    db_helper.stats = helper.stats
+    if create_schema:
+        async with helper.create_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+
+async def seed_users(prefix: str, count: int) -> list[str]:
+    """Создаем count пользователей одним хэшем пароля (без bcrypt на каждого)"""
+    password_hash = hash_password(PASSWORD)
+    emails = [f"{prefix}-{i}@bench.example.com" for i in range(count)]
+    async with db_helper.fabric_session() as session:
+        for start in range(0, count, 1000):
+            rows = [
+                {"email": email, "password_hash": password_hash, "name": "bench"}
+                for email in emails[start : start + 1000]
+            ]
+            await session.execute(insert(User), rows)
+        await session.commit()
+    return emails
+
+
+async def login(client: "httpx.AsyncClient", email: str) -> dict:
+    response = await client.post(
+        "/auth/login/",
+        data={"username": email, "password": PASSWORD},
+    )
+    response.raise_for_status()
+    return response.json()
+
+
+async def drive(
+    client: "httpx.AsyncClient",
+    request: Request,
+    total: int,
+    concurrency: int,
+    states: list[dict],
+) -> dict:
+    """
+    Выполняем total запросов в concurrency параллельных воркеров
+    args:
+        request: Request - Корутина одного запроса (client, номер, состояние воркера)
+        states: list[dict] - Состояние каждого воркера (например, его refresh токен)
+    """
+    latencies: list[float] = []
+    errors = 0
+    numbers = iter(range(total))
+
+    async def worker(state: dict) -> None:
+        nonlocal errors
+        for number in numbers:
+            start = time.perf_counter()
+            try:
+                response = await request(client, number, state)
+                ok = response.is_success
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(states[i]) for i in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+async def run(args: argparse.Namespace) -> tuple[dict[str, dict], dict]:
+    await use_database(args.db_url, args.pool_size, args.create_schema)
+    prefix = uuid.uuid4().hex[:8]
+    emails = await seed_users(prefix, args.users)
+    transport = httpx.ASGITransport(app=app_main)
+    results = {}
+    async with app_main.router.lifespan_context(app_main):
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            timeout=60,
+        ) as client:
+            # Токены для /me/ и /refresh/ получаем до замеров
+            states = []
+            for i in range(args.concurrency):
+                tokens = await login(client, emails[i % len(emails)])
+                states.append(dict(tokens))
+
+            async def register(client, number, state):
+                return await client.post(
+                    "/auth/register/",
+                    json={
+                        "email": f"{prefix}-new-{number}@bench.example.com",
+                        "password": PASSWORD,
+                        "name": "bench",
+                    },
+                )
+
+            async def login_request(client, number, state):
+                return await client.post(
+                    "/auth/login/",
+                    data={
+                        "username": emails[number % len(emails)],
+                        "password": PASSWORD,
+                    },
+                )
+
+            async def me(client, number, state):
+                return await client.get(
+                    "/auth/me/",
+                    headers={"Authorization": f"Bearer {state['access_token']}"},
+                )
+
+            async def refresh(client, number, state):
+                response = await client.post(
+                    "/auth/refresh/",
+                    headers={"Authorization": f"Bearer {state['refresh_token']}"},
+                )
+                if response.is_success:
+                    # Каждый воркер продолжает цепочку своим новым refresh токеном
+                    state.update(response.json())
+                return response
+
+            requests = {
+                "register": register,
+                "login": login_request,
+                "me": me,
+                "refresh": refresh,
+            }
+            for name in args.endpoints:
+                results[name] = await drive(
+                    client=client,
+                    request=requests[name],
+                    total=args.requests,
+                    concurrency=args.concurrency,
+                    states=states,
+                )
+    pool_stats = db_helper.pool_stats()
+    await db_helper.dispose()
+    return results, pool_stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test of the auth endpoints")
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///bench.db")
+    parser.add_argument("--create-schema", action="store_true")
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument(
+        "--endpoints",
+        type=lambda value: value.split(","),
+        default=list(ENDPOINTS),
+        help=f"comma separated subset of {','.join(ENDPOINTS)}",
+    )
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    if httpx is None:
+        parser.error("httpx is required: pip install httpx")
+    unknown = set(args.endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    results, pool_stats = asyncio.run(run(args))
+    write_results(
+        suite="http",
+        params={key: value for key, value in vars(args).items() if key != "output"},
+        results=results,
+        output=args.output,
+        extra={"db_pool": pool_stats},
+    )
@@ -0,0 +1,133 @@
+"""
+Проверка пачки access-токенов шлюзом: по одному через /auth/me/
+и пачками через /auth/introspect/ (ASGI, без сети)
+
+    python -m benchmarks.bench_introspection \
+        --db-url sqlite+aiosqlite:///bench.db --create-schema \
+        --users 1000 --batch-sizes 1,10,100,500 --output introspection.json
+
+Перед каждым вариантом кэши токенов и пользователей очищаются,
+чтобы каждый вариант платил за проверку подписи и поиск пользователя.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from pathlib import Path
+
+from pydantic import SecretStr
+
+from benchmarks.bench_http import httpx, seed_users, use_database
+from benchmarks.common import summarize, write_results
+from api.dependencies.helpers import create_access_token
+from core.config import setting
+from core.model import db_helper
+from core.schema.user import UserSnapshot
+from main import app_main
+from utils.token_cache import token_cache
+from utils.user_cache import user_cache
+
+API_KEY = "bench-gateway"
+
+
+async def reset_caches(emails: list[str]) -> None:
+    token_cache.purge()
+    for email in emails:
+        await user_cache.invalidate(email)
+
+
+async def run(args: argparse.Namespace) -> tuple[dict[str, dict], dict]:
+    setting.introspection.api_keys = [SecretStr(API_KEY)]
+    await use_database(args.db_url, args.pool_size, args.create_schema)
+    prefix = uuid.uuid4().hex[:8]
+    emails = await seed_users(prefix, args.users)
+    # Токены выпускаем напрямую: bcrypt на каждый вход здесь не нужен
+    tokens = [
+        create_access_token(UserSnapshot(id=0, email=email, name="bench"))
+        for email in emails
+    ]
+    transport = httpx.ASGITransport(app=app_main)
+    results = {}
+    extra = {"per_token_us": {}}
+    async with app_main.router.lifespan_context(app_main):
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            timeout=60,
+        ) as client:
+
+            async def me(token: str) -> None:
+                response = await client.get(
+                    "/auth/me/", headers={"Authorization": f"Bearer {token}"}
+                )
+                response.raise_for_status()
+
+            async def introspect(batch: list[str]) -> None:
+                response = await client.post(
+                    "/auth/introspect/",
+                    json={"tokens": batch},
+                    headers={"X-API-Key": API_KEY},
+                )
+                response.raise_for_status()
+                if not all(item["active"] for item in response.json()["results"]):
+                    raise RuntimeError("inactive token in a valid batch")
+
+            await reset_caches(emails)
+            latencies = []
+            numbers = iter(range(len(tokens)))
+
+            async def worker() -> None:
+                for number in numbers:
+                    start = time.perf_counter()
+                    await me(tokens[number])
+                    latencies.append(time.perf_counter() - start)
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+            results["me"] = summarize(latencies, elapsed)
+            extra["per_token_us"]["me"] = elapsed / len(tokens) * 1e6
+
+            for size in args.batch_sizes:
+                await reset_caches(emails)
+                latencies = []
+                started = time.perf_counter()
+                for offset in range(0, len(tokens), size):
+                    start = time.perf_counter()
+                    await introspect(tokens[offset : offset + size])
+                    latencies.append(time.perf_counter() - start)
+                elapsed = time.perf_counter() - started
+                name = f"introspect x{size}"
+                results[name] = summarize(latencies, elapsed)
+                extra["per_token_us"][name] = elapsed / len(tokens) * 1e6
+    await db_helper.dispose()
+    return results, extra
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gateway token validation cost")
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///bench.db")
+    parser.add_argument("--create-schema", action="store_true")
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument(
+        "--batch-sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=[1, 10, 100, 500],
+    )
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    if httpx is None:
+        parser.error("httpx is required: pip install httpx")
+    results, extra = asyncio.run(run(args))
+    for name, per_token in extra["per_token_us"].items():
+        print(f"{name}: {per_token:.0f} us/token")
+    write_results(
+        suite="introspection",
+        params={key: value for key, value in vars(args).items() if key != "output"},
+        results=results,
+        output=args.output,
+        extra=extra,
+    )
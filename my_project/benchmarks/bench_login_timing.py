@@ -0,0 +1,126 @@
+"""
+Распределение времени ответа /auth/login/ для существующего пользователя
+с неверным паролем и для неизвестной почты - по режимам hashing.unknown_user
+
+    python -m benchmarks.bench_login_timing \
+        --db-url sqlite+aiosqlite:///bench.db --create-schema \
+        --requests 200 --modes off,dummy_hash,sleep --output timing.json
+
+Для каждого режима печатаются перцентили обоих путей, статистика
+Колмогорова-Смирнова (максимальное расхождение функций распределения:
+близко к 0 - пути неразличимы по времени) и процессорное время прогона.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from bisect import bisect_right
+from pathlib import Path
+
+from benchmarks.bench_http import httpx, seed_users, use_database
+from benchmarks.common import summarize, write_results
+from core.config import setting
+from core.model import db_helper
+from main import app_main
+
+MODES = ("off", "dummy_hash", "sleep")
+
+
+def ks_statistic(first: list[float], second: list[float]) -> float:
+    """Двухвыборочная статистика Колмогорова-Смирнова"""
+    first, second = sorted(first), sorted(second)
+    if not first or not second:
+        return 0.0
+    return max(
+        abs(
+            bisect_right(first, value) / len(first)
+            - bisect_right(second, value) / len(second)
+        )
+        for value in first + second
+    )
+
+
+async def run(args: argparse.Namespace) -> tuple[dict[str, dict], dict]:
+    await use_database(args.db_url, args.pool_size, args.create_schema)
+    prefix = uuid.uuid4().hex[:8]
+    emails = await seed_users(prefix, args.users)
+    transport = httpx.ASGITransport(app=app_main)
+    results = {}
+    extra = {"ks": {}, "cpu_seconds": {}}
+    async with app_main.router.lifespan_context(app_main):
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url="http://bench",
+            timeout=60,
+        ) as client:
+
+            async def attempt(email: str) -> float:
+                start = time.perf_counter()
+                response = await client.post(
+                    "/auth/login/",
+                    data={"username": email, "password": "wrong-password"},
+                )
+                elapsed = time.perf_counter() - start
+                if response.status_code != 401:
+                    raise RuntimeError(f"unexpected status {response.status_code}")
+                return elapsed
+
+            # Прогрев: настоящие проверки наполняют замеры для режима sleep
+            for email in emails[: args.warmup]:
+                await attempt(email)
+
+            for mode in args.modes:
+                setting.hashing.unknown_user = mode
+                known, unknown = [], []
+                started = time.perf_counter()
+                cpu_started = time.process_time()
+                # Пути чередуются, чтобы нагрузка одинаково влияла на оба
+                for number in range(args.requests):
+                    known.append(await attempt(emails[number % len(emails)]))
+                    unknown.append(
+                        await attempt(f"{prefix}-missing-{number}@bench.example.com")
+                    )
+                elapsed = time.perf_counter() - started
+                results[f"{mode} known"] = summarize(known, elapsed)
+                results[f"{mode} unknown"] = summarize(unknown, elapsed)
+                extra["ks"][mode] = ks_statistic(known, unknown)
+                extra["cpu_seconds"][mode] = time.process_time() - cpu_started
+    await db_helper.dispose()
+    return results, extra
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Login timing: known vs unknown")
+    parser.add_argument("--db-url", default="sqlite+aiosqlite:///bench.db")
+    parser.add_argument("--create-schema", action="store_true")
+    parser.add_argument("--pool-size", type=int, default=5)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument(
+        "--modes",
+        type=lambda value: value.split(","),
+        default=list(MODES),
+        help=f"comma separated subset of {','.join(MODES)}",
+    )
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    if httpx is None:
+        parser.error("httpx is required: pip install httpx")
+    unknown_modes = set(args.modes) - set(MODES)
+    if unknown_modes:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown_modes))}")
+    results, extra = asyncio.run(run(args))
+    for mode in args.modes:
+        print(
+            f"{mode}: KS={extra['ks'][mode]:.3f} "
+            f"cpu={extra['cpu_seconds'][mode]:.2f}s"
+        )
+    write_results(
+        suite="login_timing",
+        params={key: value for key, value in vars(args).items() if key != "output"},
+        results=results,
+        output=args.output,
+        extra=extra,
+    )
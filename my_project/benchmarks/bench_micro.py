@@ -0,0 +1,70 @@
+"""
+Микро-бенчмарки горячих функций: encode_jwt, decode_jwt, hash_password,
+validates_password
+
+    python -m benchmarks.bench_micro --iterations 2000 --output micro.json
+"""
+
+import argparse
+from pathlib import Path
+
+from benchmarks.common import measure, write_results
+from core.config import setting
+from utils.keys import key_manager
+from utils.validates import hash_password, validates_password
+
+
+def run(iterations: int, hash_iterations: int) -> dict[str, dict]:
+    auth = setting.auth_jwt
+    payload = {
+        auth.type_payload: auth.type_access,
+        "sub": "bench@example.com",
+        "email": "bench@example.com",
+        "name": "bench",
+    }
+    signer = key_manager.signer
+
+    def encode():
+        return signer.encode(
+            payload=payload,
+            expire_minutes=auth.access_token_expire_minutes,
+        )
+
+    token = encode()
+
+    def decode():
+        return signer.decode(token)
+
+    password = "correct horse battery staple"
+    password_hash = hash_password(password)
+
+    return {
+        "encode_jwt": measure(encode, iterations),
+        "decode_jwt": measure(decode, iterations),
+        "hash_password": measure(
+            lambda: hash_password(password), hash_iterations, warmup=1
+        ),
+        "validates_password": measure(
+            lambda: validates_password(password, password_hash),
+            hash_iterations,
+            warmup=1,
+        ),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks of auth hot paths")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--hash-iterations", type=int, default=20)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    write_results(
+        suite="micro",
+        params={
+            "iterations": args.iterations,
+            "hash_iterations": args.hash_iterations,
+            "algorithm": setting.auth_jwt.algorithm,
+        },
+        results=run(iterations=args.iterations, hash_iterations=args.hash_iterations),
+        output=args.output,
+    )
@@ -0,0 +1,155 @@
+"""
+Стоимость сборки и сериализации ответа по эндпоинтам:
+прежний путь (модель -> response_model -> jsonable_encoder -> json),
+тот же путь с orjson и ModelResponse (model_construct + model_dump_json)
+
+    python -m benchmarks.bench_serialization --iterations 20000 --output ser.json
+
+Вариант orjson замеряется, только если установлен orjson.
+"""
+
+import argparse
+from pathlib import Path
+from typing import Any, Callable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+
+from benchmarks.common import measure, write_results
+from core.schema.token import TokenBase
+from core.schema.user import UserMe, UserRead, UserSnapshot
+from main import app_main
+from utils.responses import FastJSONResponse, ModelResponse, orjson
+
+# Токены реальной длины: сериализация строк заметна в общем времени
+ACCESS_TOKEN = "e" * 620
+REFRESH_TOKEN = "e" * 380
+USER = UserSnapshot(id=42, email="bench@example.com", name="bench")
+LOGGED_IN_AT = "2026-10-18T12:00:00+00:00"
+
+
+def run_sync(coroutine) -> Any:
+    """serialize_response не ждет ввода-вывода - выполняем корутину за один шаг"""
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("coroutine suspended")
+
+
+def response_field(path: str):
+    for route in app_main.routes:
+        if isinstance(route, APIRoute) and route.path == path:
+            return route.response_field
+    raise LookupError(path)
+
+
+def legacy(path: str, build: Callable[[], Any], response_class, exclude_none=False):
+    """Путь FastAPI до оптимизации: валидация по response_model и jsonable_encoder"""
+    field = response_field(path)
+
+    def render() -> bytes:
+        content = build()
+        if field is not None:
+            content = run_sync(
+                serialize_response(
+                    field=field,
+                    response_content=content,
+                    exclude_none=exclude_none,
+                )
+            )
+        else:
+            content = jsonable_encoder(content)
+        return response_class(content).body
+
+    return render
+
+
+def token() -> TokenBase:
+    return TokenBase(access_token=ACCESS_TOKEN, refresh_token=REFRESH_TOKEN)
+
+
+def user_read() -> UserRead:
+    return UserRead.model_validate(USER)
+
+
+def me() -> dict:
+    return {"email": USER.email, "name": USER.name, "logged_in_at": LOGGED_IN_AT}
+
+
+def endpoints() -> dict[str, dict[str, Callable[[], bytes]]]:
+    cases = {
+        "login": {
+            "path": "/auth/login/",
+            "build": token,
+            "fast": lambda: ModelResponse(
+                TokenBase.model_construct(
+                    access_token=ACCESS_TOKEN,
+                    refresh_token=REFRESH_TOKEN,
+                )
+            ).body,
+        },
+        "register": {
+            "path": "/auth/register/",
+            "build": user_read,
+            "fast": lambda: ModelResponse(
+                UserRead.model_construct(id=USER.id, email=USER.email, name=USER.name)
+            ).body,
+        },
+        "me": {
+            "path": None,
+            "build": me,
+            "fast": lambda: ModelResponse(
+                UserMe.model_construct(
+                    email=USER.email,
+                    name=USER.name,
+                    logged_in_at=LOGGED_IN_AT,
+                )
+            ).body,
+        },
+    }
+    variants = {}
+    for name, case in cases.items():
+        path = case["path"]
+        build = case["build"]
+        if path is None:
+            # /me/ раньше возвращал dict без response_model
+            variants[name] = {
+                "legacy": lambda build=build: JSONResponse(
+                    jsonable_encoder(build())
+                ).body,
+                "orjson": lambda build=build: FastJSONResponse(
+                    jsonable_encoder(build())
+                ).body,
+            }
+        else:
+            variants[name] = {
+                "legacy": legacy(path, build, JSONResponse),
+                "orjson": legacy(path, build, FastJSONResponse),
+            }
+        variants[name]["model_response"] = case["fast"]
+        if orjson is None:
+            del variants[name]["orjson"]
+    return variants
+
+
+def run(iterations: int) -> dict[str, dict]:
+    results = {}
+    for endpoint, variants in endpoints().items():
+        for variant, render in variants.items():
+            results[f"{endpoint} {variant}"] = measure(render, iterations)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Response serialization cost")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    write_results(
+        suite="serialization",
+        params={"iterations": args.iterations, "orjson": orjson is not None},
+        results=run(iterations=args.iterations),
+        output=args.output,
+    )
@@ -0,0 +1,86 @@
+"""
+Скорость подписи и проверки JWT для разных алгоритмов на одноразовых ключах
+
+    python -m benchmarks.bench_signers --iterations 2000 --output signers.json
+
+Ключи генерируются в памяти, файлы certs/ не нужны.
+"""
+
+import argparse
+import secrets
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from benchmarks.common import measure, write_results
+from utils.validates import Signer
+
+PAYLOAD = {
+    "type": "access",
+    "sub": "bench@example.com",
+    "email": "bench@example.com",
+    "name": "bench",
+}
+
+
+def pem_pair(private_key) -> tuple[bytes, bytes]:
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return private_pem, public_pem
+
+
+def make_signers(rsa_bits: int) -> dict[str, Signer]:
+    signers = {}
+    for algorithm, private_key in (
+        ("RS256", rsa.generate_private_key(public_exponent=65537, key_size=rsa_bits)),
+        ("ES256", ec.generate_private_key(ec.SECP256R1())),
+        ("EdDSA", ed25519.Ed25519PrivateKey.generate()),
+    ):
+        private_pem, public_pem = pem_pair(private_key)
+        signers[algorithm] = Signer.from_pem(
+            algorithm=algorithm,
+            public_pem=public_pem,
+            private_pem=private_pem,
+        )
+    signers["HS256"] = Signer.from_secret(
+        algorithm="HS256",
+        secret=secrets.token_bytes(32),
+    )
+    return signers
+
+
+def run(iterations: int, rsa_bits: int) -> dict[str, dict]:
+    results = {}
+    for algorithm, signer in make_signers(rsa_bits).items():
+        token = signer.encode(PAYLOAD, expire_minutes=15)
+        results[f"{algorithm} sign"] = measure(
+            lambda: signer.encode(PAYLOAD, expire_minutes=15),
+            iterations,
+        )
+        results[f"{algorithm} verify"] = measure(
+            lambda: signer.decode(token),
+            iterations,
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JWT sign/verify per algorithm")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--rsa-bits", type=int, default=2048)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    write_results(
+        suite="signers",
+        params={"iterations": args.iterations, "rsa_bits": args.rsa_bits},
+        results=run(iterations=args.iterations, rsa_bits=args.rsa_bits),
+        output=args.output,
+    )
@@ -0,0 +1,42 @@
+"""
+Сравнение двух прогонов бенчмарка
+
+    python -m benchmarks.compare before.json after.json
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+METRICS = ("rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def delta(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def compare(before: dict, after: dict) -> None:
+    print(f"{'name':<32} {'metric':<8} {'before':>12} {'after':>12} {'delta':>9}")
+    for name, row_after in after["results"].items():
+        row_before = before["results"].get(name)
+        if row_before is None:
+            continue
+        for metric in METRICS:
+            print(
+                f"{name:<32} {metric:<8} {row_before[metric]:>12.3f} "
+                f"{row_after[metric]:>12.3f} "
+                f"{delta(row_before[metric], row_after[metric]):>9}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark results")
+    parser.add_argument("before", type=Path)
+    parser.add_argument("after", type=Path)
+    args = parser.parse_args()
+    compare(
+        before=json.loads(args.before.read_text()),
+        after=json.loads(args.after.read_text()),
+    )
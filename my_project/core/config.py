@@ -2,7 +2,7 @@ from pathlib import Path
 from typing import Literal, ClassVar
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import BaseModel, PostgresDsn
+from pydantic import BaseModel, PostgresDsn, SecretStr, field_validator
 from fastapi.security import OAuth2PasswordBearer
 
 BASEDIR = Path(__file__).resolve().parent.parent
@@ -15,11 +15,164 @@ LOG_DEFAULT_FORMAT = "[%(asctime)s.%(msecs)03d] %(module)10s:%(lineno)-3d %(leve
 class RunConfig(BaseModel):
     host: str = "0.0.0.0"
     port: int = 8000
+    # Число рабочих процессов; больше 1 - процессы порождаются fork
+    # после предзагрузки приложения и ключей (см. core/server.py)
+    workers: int = 1
+    # auto - uvloop и httptools, если установлены
+    loop: Literal["auto", "asyncio", "uvloop"] = "auto"
+    http: Literal["auto", "h11", "httptools"] = "auto"
+    timeout_keep_alive: int = 5
+    backlog: int = 2048
+    # Сколько ждать завершения текущих запросов при остановке
+    timeout_graceful_shutdown: int = 30
+    limit_concurrency: int | None = None
+    # Перезапускать упавший рабочий процесс; пауза перед перезапуском
+    # удваивается после каждого падения подряд, до restart_max_delay
+    restart_workers: bool = True
+    restart_delay: float = 1.0
+    restart_max_delay: float = 30.0
+    # Сколько раз подряд рабочий процесс может не стартовать (ошибка
+    # в lifespan), прежде чем сервер остановится с ошибкой; 0 - без ограничения
+    max_startup_failures: int = 5
 
 
 class ConfigDatabase(BaseModel):
     url: PostgresDsn
     echo: bool = False
+    pool_size: int = 10
+    max_overflow: int = 20
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    pool_warm_up: int = 5
+    statement_cache_size: int = 100
+    # Реплики только для чтения: поиск пользователя идет на них по кругу
+    replica_urls: list[PostgresDsn] = []
+    replica_health_interval: float = 5.0
+    # Сколько секунд после записи читать ее ключ (email) с primary
+    read_your_writes_seconds: float = 5.0
+
+
+class HashingConfig(BaseModel):
+    executor: Literal["thread", "process"] = "thread"
+    max_workers: int | None = None
+    max_queue: int = 128
+    # Сколько слотов пула может занять массовая регистрация, остальные
+    # остаются входам (по умолчанию - половина пула, не меньше одного)
+    bulk_max_workers: int | None = None
+
+    scheme: Literal["bcrypt", "scrypt", "argon2"] = "bcrypt"
+    bcrypt_rounds: int = 12
+    scrypt_n: int = 2**14
+    scrypt_r: int = 8
+    scrypt_p: int = 1
+    argon2_time_cost: int = 3
+    argon2_memory_cost: int = 65536
+    argon2_parallelism: int = 4
+    rehash_on_login: bool = True
+    # Вход с неизвестной почтой не должен отвечать быстрее, чем с неверным
+    # паролем: off - без выравнивания, dummy_hash - проверка пароля против
+    # заранее посчитанного хэша, sleep - пауза в слоте пула по распределению
+    # времени недавних настоящих проверок (без затрат CPU)
+    unknown_user: Literal["off", "dummy_hash", "sleep"] = "dummy_hash"
+    # Сколько последних замеров проверки пароля хранить для режима sleep
+    timing_samples: int = 256
+
+    @field_validator("scrypt_n")
+    @classmethod
+    def check_scrypt_n(cls, value: int) -> int:
+        # В хэше хранится log2(n), поэтому n - степень двойки
+        if value < 2 or value & (value - 1):
+            raise ValueError("scrypt_n must be a power of two greater than 1")
+        return value
+
+
+class UserCacheConfig(BaseModel):
+    backend: Literal["memory", "redis"] = "memory"
+    redis_url: str = "redis://localhost:6379/0"
+    key_prefix: str = "user:"
+    ttl_seconds: float = 60.0
+    max_size: int = 10_000
+
+
+class RateLimitConfig(BaseModel):
+    enabled: bool = True
+    backend: Literal["memory", "redis"] = "memory"
+    redis_url: str = "redis://localhost:6379/0"
+    key_prefix: str = "rl:"
+    # Token bucket: скорость пополнения (попыток в секунду) и емкость
+    ip_rate: float = 1.0
+    ip_burst: int = 20
+    account_rate: float = 0.2
+    account_burst: int = 10
+    # Блокировка пары IP + аккаунт после серии неудачных входов:
+    # base * 2^(неудач - threshold) секунд, но не больше lockout_max
+    lockout_threshold: int = 5
+    lockout_base: float = 1.0
+    lockout_max: float = 900.0
+    # Неудачи старше окна забываются
+    failure_window: float = 900.0
+    # Для памяти: сколько ключей хранить (самые старые вытесняются)
+    max_keys: int = 100_000
+
+
+class MetricsConfig(BaseModel):
+    enabled: bool = True
+
+
+class RevocationConfig(BaseModel):
+    # Фильтр Блума перед таблицей отозванных токенов
+    bloom_capacity: int = 100_000
+    bloom_error_rate: float = 0.001
+    # Как часто подтягивать отзывы, сделанные другими процессами
+    sync_interval: float = 5.0
+    # Запас на транзакции, закоммиченные позже своего revoked_at
+    sync_overlap: float = 30.0
+    # Как часто удалять истекшие записи и пересобирать фильтр
+    rebuild_interval: float = 600.0
+    # Ширина корзины denylist по времени истечения токенов
+    denylist_bucket_seconds: int = 60
+
+
+class BulkRegisterConfig(BaseModel):
+    # Размер тела NDJSON одного запроса /auth/register/bulk/
+    max_body_bytes: int = 16 * 1024 * 1024
+    # Сколько проблемных строк перечислять в отчете, дальше - только счетчики
+    max_report_rows: int = 1000
+
+
+class IntrospectionConfig(BaseModel):
+    # Ключи шлюзов и sidecar-ов для /auth/introspect/ (пусто - эндпоинт закрыт)
+    api_keys: list[SecretStr] = []
+    max_batch: int = 1000
+    # Пул проверки подписей: задача пула - часть пачки не меньше chunk_size
+    max_workers: int | None = None
+    max_queue: int = 64
+    chunk_size: int = 32
+
+
+class AuditConfig(BaseModel):
+    # Журнал входов и обменов refresh-токенов (таблица AuthEvents)
+    enabled: bool = True
+    # Очередь событий в памяти рабочего процесса и размер пачки записи
+    max_queue: int = 10_000
+    batch_size: int = 500
+    # Не реже чем раз в столько секунд неполная пачка тоже пишется
+    flush_interval: float = 1.0
+    # Переполнение очереди: drop - новые события отбрасываются, пока
+    # очередь полна; sample - начиная с заполнения sample_watermark успешные
+    # события сохраняются с вероятностью sample_rate, неудачные - пока
+    # очередь не полна
+    overflow: Literal["drop", "sample"] = "sample"
+    sample_watermark: float = 0.5
+    sample_rate: float = 0.1
+    # Попыток записи пачки, прежде чем она будет отброшена
+    retry_attempts: int = 3
+    # Сколько при остановке ждать записи оставшихся событий
+    shutdown_timeout: float = 10.0
+    # Сколько месячных секций таблицы создавать наперед
+    # (python -m scripts.audit_partitions)
+    partitions_ahead: int = 2
 
 
 class LoggingConfig(BaseModel):
@@ -33,12 +186,43 @@ class LoggingConfig(BaseModel):
     log_format: str = LOG_DEFAULT_FORMAT
 
 
+class JWTKey(BaseModel):
+    """
+    Публичный ключ только для проверки: ключ, выводимый из оборота
+    (или новый ключ, опубликованный в JWKS заранее, до переключения)
+    """
+
+    public_key_path: Path
+    # По умолчанию - AuthJWT.algorithm
+    algorithm: str | None = None
+    kid: str | None = None
+
+
 class AuthJWT(BaseModel):
     private_key_path: Path = BASEDIR / "certs" / "jwt-private.pem"
     public_key_path: Path = BASEDIR / "certs" / "jwt-public.pem"
+    # RS256, ES256, EdDSA (Ed25519) - ключи из PEM-файлов,
+    # HS256/HS384/HS512 - общий секрет secret_key
     algorithm: str = "RS256"
+    # Идентификатор ключа в заголовке JWT, по умолчанию - отпечаток ключа;
+    # для HS* по умолчанию токены выдаются без kid
+    kid: str | None = None
+    secret_key: SecretStr | None = None
+    key_reload_interval: float | None = 5.0
+    # Сколько прежних ключей после ротации еще принимаются при проверке
+    previous_keys: int = 1
+    # Ключевое кольцо: ключи, которые принимаются при проверке
+    # и публикуются в /.well-known/jwks.json, но не используются для подписи
+    retiring_keys: list[JWTKey] = []
+    # Cache-Control max-age для JWKS
+    jwks_max_age: int = 300
+    # Маршруты со stateless-проверкой берут пользователя из claims access
+    # токена без запроса к базе (отзывы и отметки пользователя проверяются
+    # в памяти). False - все маршруты ищут пользователя в базе
+    stateless_validation: bool = True
     access_token_expire_minutes: int = 15
     refresh_token_expire_days: int = 30
+    token_cache_size: int = 10_000
 
     type_token: str = "Bearer"
     type_payload: str = "type"
@@ -61,6 +245,14 @@ class Settings(BaseSettings):
     run: RunConfig = RunConfig()
     logging: LoggingConfig = LoggingConfig()
     auth_jwt: AuthJWT = AuthJWT()
+    hashing: HashingConfig = HashingConfig()
+    user_cache: UserCacheConfig = UserCacheConfig()
+    rate_limit: RateLimitConfig = RateLimitConfig()
+    metrics: MetricsConfig = MetricsConfig()
+    revocation: RevocationConfig = RevocationConfig()
+    introspection: IntrospectionConfig = IntrospectionConfig()
+    bulk_register: BulkRegisterConfig = BulkRegisterConfig()
+    audit: AuditConfig = AuditConfig()
 
 
 setting = Settings()
@@ -1,9 +1,13 @@
 __all__ = (
     "Base",
     "User",
+    "RevokedToken",
+    "AuthEvent",
     "db_helper",
 )
 
 from .base import Base
 from .user import User
+from .revoked_token import RevokedToken
+from .auth_event import AuthEvent
 from .helpers_db import db_helper
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Float, Identity, Index, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class AuthEvent(Base):
+    # Секционирована по месяцам occurred_at: старый журнал удаляется
+    # целой секцией. Секции создает scripts/audit_partitions.py,
+    # ключ секционирования входит в первичный ключ
+    __table_args__ = (
+        Index("ix_AuthEvents_user_id_occurred_at", "user_id", "occurred_at"),
+        Index("ix_AuthEvents_ip_occurred_at", "ip", "occurred_at"),
+        {"postgresql_partition_by": "RANGE (occurred_at)"},
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    occurred_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), primary_key=True
+    )
+    # login / refresh
+    event: Mapped[str] = mapped_column(String(16), nullable=False)
+    # success / failure / throttled
+    outcome: Mapped[str] = mapped_column(String(16), nullable=False)
+    # Без внешнего ключа: журнал переживает удаление пользователя
+    user_id: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    # Почта из формы входа (при неудаче - как ее ввели)
+    username: Mapped[str | None] = mapped_column(String(320), nullable=True)
+    ip: Mapped[str | None] = mapped_column(String(45), nullable=True)
+    # jti предъявленного refresh токена и семейство токенов входа
+    jti: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    family: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    # Причина отказа
+    reason: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    duration_ms: Mapped[float | None] = mapped_column(Float, nullable=True)
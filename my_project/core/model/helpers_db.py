@@ -1,11 +1,200 @@
+import asyncio
+import logging
+import time
 from typing import AsyncGenerator
+
+from sqlalchemy import exc, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     async_sessionmaker,
+    AsyncConnection,
+    AsyncEngine,
     AsyncSession,
 )
+from sqlalchemy.orm import Session, configure_mappers
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql.dml import UpdateBase
 
 from core.config import setting
+from utils.metrics import DB_POOL_WAIT
+
+log = logging.getLogger(__name__)
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        DB_POOL_WAIT.observe(seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_total_seconds": self.wait_total,
+            "wait_avg_seconds": (
+                self.wait_total / self.checkouts if self.checkouts else 0.0
+            ),
+            "wait_max_seconds": self.wait_max,
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, замеряющий время ожидания соединения"""
+
+    stats: PoolStats | None = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except exc.TimeoutError:
+            if self.stats is not None:
+                self.stats.timeouts += 1
+            raise
+        if self.stats is not None:
+            self.stats.record_wait(time.perf_counter() - start)
+        return conn
+
+    def recreate(self):
+        # dispose() пересоздает пул - переносим статистику в новый
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class ReplicaSet:
+    """
+    Реплики только для чтения: выбор по кругу среди здоровых,
+    периодическая проверка SELECT 1 и окно read-your-writes -
+    ключи, записанные этим процессом недавно, читаются с primary
+    """
+
+    def __init__(
+        self,
+        engines: list[AsyncEngine],
+        read_your_writes_seconds: float = 5.0,
+    ):
+        self.engines = engines
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.healthy = [True] * len(engines)
+        self.routed = [0] * len(engines)
+        self._next = 0
+        # ключ -> monotonic-время, до которого читаем с primary
+        self._pinned: dict[str, float] = {}
+
+    def choose(self) -> AsyncEngine | None:
+        for _ in range(len(self.engines)):
+            index = self._next
+            self._next = (self._next + 1) % len(self.engines)
+            if self.healthy[index]:
+                self.routed[index] += 1
+                return self.engines[index]
+        return None
+
+    def pin(self, key: str) -> None:
+        now = time.monotonic()
+        if len(self._pinned) > 10_000:
+            self._pinned = {k: t for k, t in self._pinned.items() if t > now}
+        self._pinned[key] = now + self.read_your_writes_seconds
+
+    def is_pinned(self, key: str | None) -> bool:
+        if key is None:
+            return False
+        until = self._pinned.get(key)
+        return until is not None and until > time.monotonic()
+
+    async def check_health(self) -> None:
+        for index, engine in enumerate(self.engines):
+            try:
+                async with engine.connect() as conn:
+                    await conn.execute(text("SELECT 1"))
+                healthy = True
+            except Exception as error:
+                healthy = False
+                if self.healthy[index]:
+                    log.warning("Replica %s is down: %s", engine.url, error)
+            if healthy and not self.healthy[index]:
+                log.info("Replica %s is back", engine.url)
+            self.healthy[index] = healthy
+
+    async def health_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.check_health()
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
+
+    def stats(self) -> dict:
+        return {
+            "replicas": len(self.engines),
+            "replicas_healthy": sum(self.healthy),
+            "replica_reads": sum(self.routed),
+        }
+
+
+class RoutingSession(Session):
+    """
+    Session, отправляющая запросы с replica=True (в execution_options
+    запроса или в bind_arguments при выполнении) на реплику. Все остальное,
+    а также любые чтения после записи в той же сессии, идет на primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, replica=False, replica_key=None, **kw):
+        replicas: ReplicaSet | None = self.info.get("replicas")
+        if replicas is not None and clause is not None:
+            if isinstance(clause, UpdateBase):
+                self.info["wrote"] = True
+            else:
+                options = clause.get_execution_options()
+                replica = replica or options.get("replica")
+                replica_key = replica_key or options.get("replica_key")
+                if (
+                    replica
+                    and not self.info.get("wrote")
+                    and not replicas.is_pinned(replica_key)
+                ):
+                    engine = replicas.choose()
+                    if engine is not None:
+                        return engine.sync_engine
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+def make_engine(
+    url: str,
+    echo: bool,
+    stats: PoolStats,
+    statement_cache_size: int | None,
+    **pool_options,
+) -> AsyncEngine:
+    connect_args = {}
+    if (
+        statement_cache_size is not None
+        and make_url(url).get_driver_name() == "asyncpg"
+    ):
+        connect_args = {
+            "statement_cache_size": statement_cache_size,
+            "prepared_statement_cache_size": statement_cache_size,
+        }
+    engine = create_async_engine(
+        url=url,
+        echo=echo,
+        poolclass=InstrumentedQueuePool,
+        connect_args=connect_args,
+        **pool_options,
+    )
+    engine.pool.stats = stats
+    return engine
 
 
 class DatabaseHelper:
@@ -13,27 +202,159 @@ class DatabaseHelper:
         self,
         url: str,
         echo: bool,
+        pool_size: int = 5,
+        max_overflow: int = 10,
+        pool_timeout: float = 30.0,
+        pool_recycle: int = -1,
+        pool_pre_ping: bool = False,
+        statement_cache_size: int | None = None,
+        replica_urls: list[str] | None = None,
+        read_your_writes_seconds: float = 5.0,
     ):
-        self.create_engine = create_async_engine(
-            url=url,
-            echo=echo,
-        )
-        self.fabric_session = async_sessionmaker(
-            bind=self.create_engine,
-            autoflush=False,
-            expire_on_commit=False,
+        # Движки создаются при первом обращении (обычно в lifespan):
+        # импорт приложения не загружает драйвер базы данных
+        self.url = url
+        self.echo = echo
+        self.statement_cache_size = statement_cache_size
+        self.replica_urls = replica_urls or []
+        self.read_your_writes_seconds = read_your_writes_seconds
+        self.pool_options = dict(
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=pool_pre_ping,
         )
+        self.stats = PoolStats()
+        self.replica_stats = PoolStats()
+        self._engine: AsyncEngine | None = None
+        self._replicas: ReplicaSet | None = None
+        self._fabric_session: async_sessionmaker[AsyncSession] | None = None
+
+    @property
+    def create_engine(self) -> AsyncEngine:
+        if self._engine is None:
+            self._engine = make_engine(
+                url=self.url,
+                echo=self.echo,
+                stats=self.stats,
+                statement_cache_size=self.statement_cache_size,
+                **self.pool_options,
+            )
+        return self._engine
+
+    @create_engine.setter
+    def create_engine(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+
+    @property
+    def replicas(self) -> ReplicaSet | None:
+        if self._replicas is None and self.replica_urls:
+            self._replicas = ReplicaSet(
+                engines=[
+                    make_engine(
+                        url=replica_url,
+                        echo=self.echo,
+                        stats=self.replica_stats,
+                        statement_cache_size=self.statement_cache_size,
+                        **self.pool_options,
+                    )
+                    for replica_url in self.replica_urls
+                ],
+                read_your_writes_seconds=self.read_your_writes_seconds,
+            )
+        return self._replicas
+
+    @property
+    def fabric_session(self) -> async_sessionmaker[AsyncSession]:
+        if self._fabric_session is None:
+            self._fabric_session = async_sessionmaker(
+                bind=self.create_engine,
+                sync_session_class=RoutingSession,
+                info={"replicas": self.replicas},
+                autoflush=False,
+                expire_on_commit=False,
+            )
+        return self._fabric_session
+
+    @fabric_session.setter
+    def fabric_session(self, fabric_session: async_sessionmaker[AsyncSession]) -> None:
+        self._fabric_session = fabric_session
+
+    def engines(self) -> list[AsyncEngine]:
+        """Уже созданные движки: primary и реплики"""
+        engines = [] if self._engine is None else [self._engine]
+        if self._replicas is not None:
+            engines.extend(self._replicas.engines)
+        return engines
+
+    def warm(self) -> None:
+        """Создаем движки и сессии заранее (в lifespan или до fork)"""
+        self.fabric_session
+        # Маппинг моделей иначе собирается на первом запросе
+        configure_mappers()
 
     async def dispose(self) -> None:
-        await self.create_engine.dispose()
+        for engine in self.engines():
+            await engine.dispose()
+
+    def pin_to_primary(self, key: str) -> None:
+        """Read-your-writes: ключ только что записан - читаем его с primary"""
+        if self.replicas is not None:
+            self.replicas.pin(key)
+
+    async def warm_up(self, connections: int) -> None:
+        """
+        Заранее открываем соединения, чтобы первые запросы не ждали connect
+        args:
+            connections: int - Сколько соединений открыть (не больше pool_size)
+        """
+        connections = min(connections, self.create_engine.pool.size())
+        if connections <= 0:
+            return
+
+        async def open_connection() -> AsyncConnection:
+            return await self.create_engine.connect()
+
+        opened = await asyncio.gather(
+            *(open_connection() for _ in range(connections)),
+            return_exceptions=True,
+        )
+        for conn in opened:
+            if isinstance(conn, BaseException):
+                log.warning("Pool warm-up failed: %s", conn)
+                continue
+            await conn.close()
+
+    def pool_stats(self) -> dict:
+        pool = self.create_engine.pool
+        stats = {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            **self.stats.as_dict(),
+        }
+        if self.replicas is not None:
+            stats.update(self.replicas.stats())
+        return stats
 
     async def session_getter(self) -> AsyncGenerator[AsyncSession | None]:
+        # AsyncSession берет соединение из пула только при первом запросе,
+        # поэтому обработчики без обращений к базе пул не занимают
         async with self.fabric_session() as session:
             yield session
-            await session.close()
 
 
 db_helper = DatabaseHelper(
     url=str(setting.db.url),
     echo=setting.db.echo,
+    pool_size=setting.db.pool_size,
+    max_overflow=setting.db.max_overflow,
+    pool_timeout=setting.db.pool_timeout,
+    pool_recycle=setting.db.pool_recycle,
+    pool_pre_ping=setting.db.pool_pre_ping,
+    statement_cache_size=setting.db.statement_cache_size,
+    replica_urls=[str(url) for url in setting.db.replica_urls],
+    read_your_writes_seconds=setting.db.read_your_writes_seconds,
 )
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import Base
+
+
+class RevokedToken(Base):
+    # jti отозванного токена или идентификатор отозванного семейства
+    # refresh-токенов (оба - uuid4, поэтому хранятся в одной колонке)
+    jti: Mapped[str] = mapped_column(String(36), unique=True, nullable=False)
+    # rotated - refresh-токен уже обменян, family - отозвано все семейство
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)
+    family: Mapped[str | None] = mapped_column(String(36), nullable=True)
+    # Совпадает с exp токена: после него запись не нужна
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), index=True, nullable=False
+    )
+    revoked_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        index=True,
+        server_default=func.now(),
+        nullable=False,
+    )
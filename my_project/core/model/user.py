@@ -1,12 +1,45 @@
+from datetime import datetime
+
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import String
+from sqlalchemy import Boolean, CheckConstraint, DateTime, Index, String, false, func
 
 from .base import Base
 
 
 class User(Base):
+    __table_args__ = (
+        CheckConstraint(
+            "length(password_hash) <= 128",
+            name="ck_Users_password_hash_length",
+        ),
+    )
+
     email: Mapped[str] = mapped_column(
         String(length=320), unique=True, index=True, nullable=False
     )
+    # Длину хэша ограничивает CHECK, а не тип колонки: сужение varchar
+    # переписывало бы таблицу под блокировкой (миграция 5b1f2c7a9d3e)
     password_hash: Mapped[str] = mapped_column(String(1024), nullable=False)
     name: Mapped[str] = mapped_column(String(50), nullable=False)
+    is_superuser: Mapped[bool] = mapped_column(
+        Boolean, server_default=false(), nullable=False
+    )
+    # Токены, выданные не позже этого момента, недействительны
+    tokens_valid_after: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), index=True, nullable=True
+    )
+    # Последнее изменение профиля: по нему процессы сбрасывают кэш снимков
+    updated_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), index=True, nullable=True
+    )
+
+
+# Поиск при входе без учета регистра. Покрывающий индекс: все колонки,
+# которые читает get_user_by_email, есть в индексе - index-only scan
+# без обращения к строке таблицы. Создается миграцией CONCURRENTLY
+Index(
+    "ix_Users_email_lower",
+    func.lower(User.email),
+    unique=True,
+    postgresql_include=["id", "email", "password_hash", "name", "is_superuser"],
+)
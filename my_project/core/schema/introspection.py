@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field
+
+from core.config import setting
+
+
+class IntrospectRequest(BaseModel):
+    # Слишком большую пачку отклоняет валидация (422), до разбора токенов
+    tokens: list[str] = Field(min_length=1, max_length=setting.introspection.max_batch)
+
+
+class IntrospectResult(BaseModel):
+    """Ответ по одному токену в духе RFC 7662: у неактивного - только active"""
+
+    active: bool
+    token_type: str | None = None
+    sub: str | None = None
+    username: str | None = None
+    user_id: int | None = None
+    exp: int | None = None
+    iat: int | None = None
+    jti: str | None = None
+
+
+class IntrospectResponse(BaseModel):
+    # В порядке токенов запроса
+    results: list[IntrospectResult]
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, EmailStr, ConfigDict
 
 
@@ -18,6 +20,46 @@ class UserRead(BaseModel):
     name: str
     model_config = ConfigDict(from_attributes=True)
 
+
+class UserMe(BaseModel):
+    email: str
+    name: str
+    logged_in_at: str | None = None
+
+
+class UserSnapshot(BaseModel):
+    """Компактный снимок пользователя для кэша (без хэша пароля)"""
+
+    id: int
+    email: str
+    name: str
+    is_superuser: bool = False
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+class BulkUserResult(BaseModel):
+    """Результат массовой регистрации для одной строки входного потока"""
+
+    index: int
+    status: Literal["created", "conflict", "invalid"]
+    email: str | None = None
+    id: int | None = None
+    detail: str | None = None
+
+
+class BulkRegisterReport(BaseModel):
+    """
+    Итог массовой регистрации: по строкам - только проблемные строки,
+    не больше bulk_register.max_report_rows, остальные - в счетчиках
+    """
+
+    created: int = 0
+    conflicts_total: int = 0
+    invalid_total: int = 0
+    conflicts: list[BulkUserResult] = []
+    invalid: list[BulkUserResult] = []
+
+
 class UserUpdate(BaseModel):
     email: EmailStr | None = None
     password: str | None = None
@@ -25,13 +67,15 @@ class UserUpdate(BaseModel):
 
     model_config = ConfigDict(from_attributes=True)
 
+
 class UserLogin(BaseModel):
     model_config = ConfigDict(strict=True)
     email: EmailStr
     password_hash: str
     name: str
 
+
 class UserReadLogin(BaseModel):
     username: str
     password: str
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,182 @@
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from contextlib import suppress
+
+import uvicorn
+from fastapi import FastAPI
+
+from core.config import setting
+from core.model import db_helper
+from utils.keys import key_manager
+from utils.startup import startup_profiler
+
+log = logging.getLogger(__name__)
+
+# Код выхода рабочего процесса, который не смог стартовать (как у uvicorn)
+STARTUP_FAILURE = 3
+
+
+def uvicorn_config(app: FastAPI) -> uvicorn.Config:
+    run = setting.run
+    return uvicorn.Config(
+        app,
+        host=run.host,
+        port=run.port,
+        loop=run.loop,
+        http=run.http,
+        timeout_keep_alive=run.timeout_keep_alive,
+        backlog=run.backlog,
+        timeout_graceful_shutdown=run.timeout_graceful_shutdown,
+        limit_concurrency=run.limit_concurrency,
+        lifespan="on",
+    )
+
+
+class Supervisor:
+    """
+    Предзагрузка и fork рабочих процессов.
+    Родитель один раз импортирует приложение, разбирает конфигурацию
+    и ключи и открывает слушающий сокет; рабочие процессы наследуют все это
+    через fork (copy-on-write) и принимают соединения с общего сокета.
+    SIGTERM/SIGINT пересылаются рабочим: uvicorn дожидается текущих
+    запросов (timeout_graceful_shutdown), затем lifespan закрывает пулы.
+    Упавший процесс перезапускается с растущей паузой; если процесс
+    max_startup_failures раз подряд не стартовал, останавливается весь сервер.
+    """
+
+    def __init__(self, app: FastAPI, workers: int):
+        self.app = app
+        self.workers = workers
+        self.config = uvicorn_config(app)
+        self.children: dict[int, int] = {}
+        # По номеру рабочего процесса: время запуска, падения и неудачные
+        # старты подряд
+        self._spawned_at: dict[int, float] = {}
+        self._failures: dict[int, int] = {}
+        self._startup_failures: dict[int, int] = {}
+        self.should_exit = False
+        self.exit_code = 0
+        self._sock: socket.socket | None = None
+
+    def preload(self) -> None:
+        # Ключи разбираются до fork - рабочим не нужно читать PEM
+        key_manager.load()
+        db_helper.warm()
+        self.config.load()
+        self._sock = self.config.bind_socket()
+
+    def _run_worker(self) -> bool:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        self.children.clear()
+        startup_profiler.restart()
+        # Соединения, открытые родителем, не должны делиться между процессами
+        for engine in db_helper.engines():
+            engine.sync_engine.dispose(close=False)
+        server = uvicorn.Server(self.config)
+        server.run(sockets=[self._sock])
+        return server.started
+
+    def spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                if not self._run_worker():
+                    # Ошибка в lifespan, uvicorn уже записал ее в лог
+                    code = STARTUP_FAILURE
+            except KeyboardInterrupt:
+                # uvicorn повторно поднимает SIGINT после штатной остановки
+                pass
+            except BaseException:
+                log.exception("Worker %s crashed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self.children[pid] = index
+        self._spawned_at[index] = time.monotonic()
+        log.info("Started worker %s (pid %s)", index, pid)
+
+    def _handle_exit(self, signum, frame) -> None:
+        self.should_exit = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _restart_delay(self, index: int) -> float:
+        """Пауза перед перезапуском: удваивается с каждым падением подряд"""
+        run = setting.run
+        # Процесс, проработавший дольше максимальной паузы, упал не подряд
+        if time.monotonic() - self._spawned_at[index] > run.restart_max_delay:
+            self._failures[index] = 0
+        failures = self._failures.get(index, 0)
+        self._failures[index] = failures + 1
+        return min(run.restart_delay * 2**failures, run.restart_max_delay)
+
+    def _wait(self, delay: float) -> None:
+        """Ждем delay секунд; SIGTERM/SIGINT прерывают ожидание"""
+        deadline = time.monotonic() + delay
+        while not self.should_exit and time.monotonic() < deadline:
+            time.sleep(max(0.0, min(0.1, deadline - time.monotonic())))
+
+    def run(self) -> None:
+        self.preload()
+        signal.signal(signal.SIGTERM, self._handle_exit)
+        signal.signal(signal.SIGINT, self._handle_exit)
+        for index in range(self.workers):
+            self.spawn(index)
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            index = self.children.pop(pid, None)
+            if index is None or self.should_exit:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            log.warning("Worker %s (pid %s) exited with status %s", index, pid, code)
+            if code == STARTUP_FAILURE:
+                self._startup_failures[index] = self._startup_failures.get(index, 0) + 1
+            else:
+                self._startup_failures[index] = 0
+            limit = setting.run.max_startup_failures
+            if code == STARTUP_FAILURE and (
+                not setting.run.restart_workers
+                or (limit and self._startup_failures[index] >= limit)
+            ):
+                # Вероятно, ошибка конфигурации или база недоступна -
+                # перезапуски не помогут, выходим с ошибкой
+                log.error(
+                    "Worker %s failed to start %s times in a row, shutting down",
+                    index,
+                    self._startup_failures[index],
+                )
+                self.exit_code = STARTUP_FAILURE
+                self._handle_exit(signal.SIGTERM, None)
+                continue
+            if setting.run.restart_workers:
+                self._wait(self._restart_delay(index))
+                if not self.should_exit:
+                    self.spawn(index)
+        self._sock.close()
+
+
+def serve(app: FastAPI) -> None:
+    """Запуск сервера по настройкам RunConfig"""
+    if setting.run.workers <= 1:
+        server = uvicorn.Server(uvicorn_config(app))
+        with suppress(KeyboardInterrupt):
+            server.run()
+        if not server.started:
+            sys.exit(STARTUP_FAILURE)
+        return
+    supervisor = Supervisor(app=app, workers=setting.run.workers)
+    supervisor.run()
+    if supervisor.exit_code:
+        sys.exit(supervisor.exit_code)
@@ -1,27 +1,91 @@
-import uvicorn
-from contextlib import asynccontextmanager
+# Первым: отсчет времени запуска и (опционально) профиль импорта
+from utils.startup import StartupMiddleware, startup_profiler
+
+from contextlib import asynccontextmanager, suppress
 import logging
+import asyncio
+import os
 from fastapi import FastAPI
 
 from core.config import setting
 from core.model import db_helper
+from utils.hasher import password_hasher
+from utils.introspection import token_verifier
+from utils.keys import key_manager
+from utils.rate_limit import login_limiter
+from utils.responses import FastJSONResponse
+from utils.user_cache import user_cache
+from api.CRUD.crud_audit import start_audit, stop_audit
+from api.CRUD.crud_token import revocation_sync_loop, sync_revocations
 from api.user_api import router as router_user
+from api.jwks_api import router as router_jwks
+from api.introspect_api import router as router_introspect
+from api.metrics_api import router as router_metrics, MetricsMiddleware
 
 logging.basicConfig(
     level=logging.INFO,
     format=setting.logging.log_format,
 )
+log = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # startup (в каждом рабочем процессе)
+    log.info("Worker %s starting", os.getpid())
+    with startup_profiler.phase("keys"):
+        # После fork ключи уже разобраны в родителе (Supervisor.preload)
+        if not key_manager.loaded:
+            key_manager.load()
+    with startup_profiler.phase("database"):
+        db_helper.warm()
+        await db_helper.warm_up(setting.db.pool_warm_up)
+    with startup_profiler.phase("revocations"):
+        try:
+            await sync_revocations(rebuild=True)
+        except Exception:
+            # Стартуем без фильтра (токены проверяются по базе),
+            # revocation_sync_loop повторит синхронизацию
+            log.exception("Failed to load revoked tokens, will retry")
+    with startup_profiler.phase("audit"):
+        audit_task = await start_audit()
+    tasks = [asyncio.create_task(revocation_sync_loop())]
+    if db_helper.replicas is not None:
+        await db_helper.replicas.check_health()
+        tasks.append(
+            asyncio.create_task(
+                db_helper.replicas.health_loop(setting.db.replica_health_interval)
+            )
+        )
+    startup_profiler.mark("ready")
     yield
-    # shutdown
+    # shutdown: uvicorn уже дождался текущих запросов и их фоновых задач,
+    # новых событий аудита не будет - дописываем очередь, пока жива база
+    await stop_audit(audit_task)
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    # Сначала пул хэширования (его задачи могут писать в базу), затем база
+    password_hasher.shutdown(wait=True)
+    token_verifier.shutdown(wait=True)
     await db_helper.dispose()
+    await user_cache.close()
+    await login_limiter.close()
+    log.info("Worker %s stopped", os.getpid())
 
 
-app_main = FastAPI(lifespan=lifespan)
+app_main = FastAPI(
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
 app_main.include_router(router=router_user)
+app_main.include_router(router=router_jwks)
+app_main.include_router(router=router_introspect)
+if setting.metrics.enabled:
+    app_main.include_router(router=router_metrics)
+    app_main.add_middleware(MetricsMiddleware)
+app_main.add_middleware(StartupMiddleware)
 
 
 @app_main.get("/")
@@ -31,9 +95,11 @@ async def get_hello():
     }
 
 
+startup_profiler.mark("imported")
+
+
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app_main",
-        host=setting.run.host,
-        port=setting.run.port,
-    )
+    # uvicorn нужен только для запуска сервера, не для импорта приложения
+    from core.server import serve
+
+    serve(app_main)
@@ -6,4 +6,7 @@ echo "Run apply migration..."
 alembic upgrade head
 echo "Migration applied"
 
+# Без секций события аудита пишутся в AuthEvents_default - запуск не прерываем
+python -m scripts.audit_partitions || echo "Audit partitions were not created"
+
 exec "$@"
\ No newline at end of file
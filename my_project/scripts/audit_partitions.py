@@ -0,0 +1,43 @@
+"""
+Месячные секции журнала аудита (AuthEvents): текущий месяц
+и audit.partitions_ahead следующих
+
+    python -m scripts.audit_partitions --months-ahead 2
+
+Запускается после миграций (prestart.sh) и по расписанию, например
+раз в месяц из cron - рабочие процессы секции не создают.
+Код выхода 1, если какую-то секцию создать не удалось.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+
+from api.CRUD.crud_audit import ensure_audit_partitions
+from core.config import setting
+from core.model import db_helper
+
+
+async def main(months_ahead: int) -> list[str]:
+    try:
+        async with db_helper.fabric_session() as session:
+            return await ensure_audit_partitions(session, months_ahead)
+    finally:
+        await db_helper.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create audit log partitions")
+    parser.add_argument(
+        "--months-ahead",
+        type=int,
+        default=setting.audit.partitions_ahead,
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format=setting.logging.log_format)
+    failed = asyncio.run(main(months_ahead=args.months_ahead))
+    if failed:
+        print(f"Failed partitions: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Audit partitions ready ({args.months_ahead} months ahead)")
@@ -0,0 +1,56 @@
+"""
+Массовая регистрация пользователей из NDJSON-файла
+
+    python -m scripts.bulk_register users.ndjson --chunk-size 1000 > report.ndjson
+
+Каждая строка входа - JSON объекта UserCreate (email, password, name).
+В stdout пишется по одной строке BulkUserResult на каждую строку входа,
+итог - в stderr.
+"""
+
+import argparse
+import asyncio
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import AsyncIterator
+
+from api.CRUD.crud_user import create_users_bulk
+from core.model import db_helper
+from utils.hasher import password_hasher
+
+
+async def read_lines(path: Path) -> AsyncIterator[str]:
+    if str(path) == "-":
+        for line in sys.stdin:
+            yield line
+        return
+    with path.open(encoding="utf-8") as file:
+        for line in file:
+            yield line
+
+
+async def main(path: Path, chunk_size: int) -> Counter:
+    summary = Counter()
+    try:
+        async with db_helper.fabric_session() as session:
+            async for result in create_users_bulk(
+                session=session,
+                lines=read_lines(path),
+                chunk_size=chunk_size,
+            ):
+                summary[result.status] += 1
+                sys.stdout.write(result.model_dump_json(exclude_none=True) + "\n")
+    finally:
+        await db_helper.dispose()
+        password_hasher.shutdown()
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk user registration")
+    parser.add_argument("path", type=Path, help="NDJSON file or '-' for stdin")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+    summary = asyncio.run(main(path=args.path, chunk_size=args.chunk_size))
+    print(dict(summary), file=sys.stderr)
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from core.config import setting
+from core.model import Base, db_helper
+from utils.revocation import revocation_filter
+from utils.user_cache import user_cache
+
+
+@pytest.fixture
+def fast_hashing(monkeypatch):
+    monkeypatch.setattr(setting.hashing, "scheme", "bcrypt")
+    monkeypatch.setattr(setting.hashing, "bcrypt_rounds", 4)
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch, fast_hashing):
+    """
+    База SQLite вместо Postgres для db_helper. Каждый тест выполняется
+    в своем asyncio.run, поэтому соединения не переиспользуются (NullPool)
+    """
+    pytest.importorskip("aiosqlite")
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'test.db'}",
+        poolclass=NullPool,
+    )
+
+    async def create_schema() -> None:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_schema())
+    monkeypatch.setattr(db_helper, "create_engine", engine)
+    monkeypatch.setattr(
+        db_helper,
+        "fabric_session",
+        async_sessionmaker(engine, autoflush=False, expire_on_commit=False),
+    )
+    # Состояние процесса: будто рабочий процесс только запустился
+    monkeypatch.setattr(revocation_filter, "synced_at", None)
+    monkeypatch.setattr(revocation_filter, "ready", False)
+    asyncio.run(user_cache.purge())
+    yield db_helper.fabric_session
+    asyncio.run(user_cache.purge())
+    asyncio.run(engine.dispose())
@@ -0,0 +1,69 @@
+"""
+Перечитывание ключей JWT: пока пара заменена наполовину, KeyManager
+продолжает подписывать прежним ключом
+
+    python -m pytest tests/test_keys.py
+"""
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from utils.keys import KeyManager
+
+GENERATORS = {
+    "RS256": lambda: rsa.generate_private_key(public_exponent=65537, key_size=2048),
+    "ES256": lambda: ec.generate_private_key(ec.SECP256R1()),
+    "EdDSA": ed25519.Ed25519PrivateKey.generate,
+}
+
+
+def key_pair(algorithm: str) -> tuple[bytes, bytes]:
+    private_key = GENERATORS[algorithm]()
+    private_pem = private_key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return private_pem, public_pem
+
+
+@pytest.mark.parametrize("algorithm", sorted(GENERATORS))
+def test_half_rotated_pair_keeps_current_signer(tmp_path, algorithm):
+    private_path = tmp_path / "jwt-private.pem"
+    public_path = tmp_path / "jwt-public.pem"
+    old_private, old_public = key_pair(algorithm)
+    new_private, new_public = key_pair(algorithm)
+    private_path.write_bytes(old_private)
+    public_path.write_bytes(old_public)
+    manager = KeyManager(
+        private_key_path=private_path,
+        public_key_path=public_path,
+        algorithm=algorithm,
+        reload_interval=0,
+    )
+    manager.load()
+    old_signer = manager.signer
+
+    # Приватный ключ уже новый, публичный - еще старый
+    private_path.write_bytes(new_private)
+    signer = manager.signer
+    assert signer is old_signer
+    token = signer.encode({"sub": "a@example.com"}, expire_minutes=5)
+    kid = jwt.get_unverified_header(token)["kid"]
+    assert manager.get_verifier(kid).decode(token)["sub"] == "a@example.com"
+
+    # Пара заменена полностью - активируется новый ключ
+    public_path.write_bytes(new_public)
+    signer = manager.signer
+    assert signer is not old_signer
+    assert signer.kid != old_signer.kid
+    assert manager.get_verifier(old_signer.kid) is old_signer
+    token = signer.encode({"sub": "a@example.com"}, expire_minutes=5)
+    kid = jwt.get_unverified_header(token)["kid"]
+    assert manager.get_verifier(kid).decode(token)["sub"] == "a@example.com"
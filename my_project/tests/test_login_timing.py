@@ -0,0 +1,91 @@
+"""
+Время проверки пароля для существующего пользователя и для неизвестной почты
+(PasswordHasher.verify_dummy) не должно различаться, в том числе под нагрузкой,
+когда проверки ждут в очереди пула
+
+    python -m pytest tests/test_login_timing.py
+"""
+
+import asyncio
+import time
+from bisect import bisect_right
+
+import pytest
+
+from core.config import setting
+from utils.hasher import PasswordHasher
+from utils.workers import WorkerPool
+
+# Фоновые регистрации: пул все время занят и проверки ждут в очереди -
+# это ожидание путь неизвестного пользователя тоже должен повторять
+BACKGROUND = 4
+SAMPLES = 100
+# Порог статистики Колмогорова-Смирнова: шум дает ~0.1-0.3, пауза мимо
+# очереди пула - ~0.6, режим off - 1
+KS_THRESHOLD = 0.4
+
+
+def ks_statistic(first: list[float], second: list[float]) -> float:
+    """Двухвыборочная статистика Колмогорова-Смирнова"""
+    first, second = sorted(first), sorted(second)
+    return max(
+        abs(
+            bisect_right(first, value) / len(first)
+            - bisect_right(second, value) / len(second)
+        )
+        for value in first + second
+    )
+
+
+async def measure(mode: str) -> tuple[list[float], list[float]]:
+    """Время неверного пароля для известного и неизвестного пользователя"""
+    hasher = PasswordHasher(pool=WorkerPool(name="test", max_workers=1, max_queue=64))
+    try:
+        password_hash = await hasher.hash("correct-password")
+        # Спокойный период до всплеска нагрузки: замеры для режима sleep
+        for _ in range(64):
+            await hasher.verify("wrong-password", password_hash)
+
+        async def background() -> None:
+            while True:
+                await hasher.hash("new-user-password")
+
+        async def timed(check) -> float:
+            start = time.perf_counter()
+            await check
+            return time.perf_counter() - start
+
+        load = [asyncio.create_task(background()) for _ in range(BACKGROUND)]
+        known, unknown = [], []
+        try:
+            # Пути чередуются, чтобы нагрузка одинаково влияла на оба
+            for _ in range(SAMPLES):
+                known.append(
+                    await timed(hasher.verify("wrong-password", password_hash))
+                )
+                unknown.append(await timed(hasher.verify_dummy("wrong-password", mode)))
+        finally:
+            for task in load:
+                task.cancel()
+            await asyncio.gather(*load, return_exceptions=True)
+        return known, unknown
+    finally:
+        hasher.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def fast_bcrypt(monkeypatch):
+    monkeypatch.setattr(setting.hashing, "scheme", "bcrypt")
+    monkeypatch.setattr(setting.hashing, "bcrypt_rounds", 6)
+
+
+@pytest.mark.parametrize("mode", ["dummy_hash", "sleep"])
+def test_unknown_user_timing_matches_known(mode):
+    known, unknown = asyncio.run(measure(mode))
+    assert ks_statistic(known, unknown) < KS_THRESHOLD
+
+
+def test_off_mode_timing_differs():
+    # Проверка на то, что тест вообще замечает утечку
+    known, unknown = asyncio.run(measure("off"))
+    assert ks_statistic(known, unknown) > 1 - KS_THRESHOLD
@@ -0,0 +1,52 @@
+"""
+Отклоненный обмен refresh-токена попадает в журнал аудита вместе с claims
+токена, если его подпись верна
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from api import user_api
+from api.CRUD.crud_user import create_user
+from api.dependencies.helpers import create_refresh_token
+from core.config import setting
+from core.schema.user import UserCreate
+from utils.audit import OUTCOME_FAILURE, AuditQueue
+
+REQUEST = SimpleNamespace(client=SimpleNamespace(host="192.0.2.1"))
+
+
+def test_reused_refresh_token_is_audited_with_claims(database, monkeypatch):
+    queue = AuditQueue(config=setting.audit)
+    monkeypatch.setattr(user_api, "audit_queue", queue)
+
+    async def refresh(token: str):
+        async with database() as session:
+            return await user_api.refresh_jwt_token(
+                session=session, request=REQUEST, data_user=token
+            )
+
+    async def scenario():
+        queue.open()
+        async with database() as session:
+            user = await create_user(
+                session=session,
+                data_user=UserCreate(email="a@example.com", password="pw", name="A"),
+            )
+        token = create_refresh_token(user)
+        await refresh(token)
+        # Повторное предъявление обмененного токена
+        with pytest.raises(HTTPException):
+            await refresh(token)
+        return user, queue.take(limit=10)
+
+    user, events = asyncio.run(scenario())
+    failure = events[-1]
+    assert failure.outcome == OUTCOME_FAILURE
+    assert failure.user_id == user.id
+    assert failure.username == user.email
+    assert failure.jti == events[0].jti
+    assert failure.family == events[0].family
@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from api.CRUD.crud_user import create_user
+from core.schema.user import UserCreate
+from utils.hasher import password_hasher
+
+
+def test_taken_email_is_rejected_before_hashing(database):
+    async def scenario():
+        async with database() as session:
+            await create_user(
+                session=session,
+                data_user=UserCreate(email="a@example.com", password="pw", name="A"),
+            )
+        submitted = password_hasher.pool.submitted
+        async with database() as session:
+            with pytest.raises(HTTPException) as error:
+                await create_user(
+                    session=session,
+                    data_user=UserCreate(
+                        email="A@Example.com", password="pw", name="A"
+                    ),
+                )
+        return error.value.status_code, password_hasher.pool.submitted - submitted
+
+    assert asyncio.run(scenario()) == (409, 0)
@@ -0,0 +1,101 @@
+"""
+Изменения пользователя, сделанные одним рабочим процессом, другие процессы
+подхватывают при синхронизации отзывов (sync_revocations)
+"""
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from api.CRUD import crud_token
+from api.CRUD.crud_token import sync_revocations
+from api.CRUD.crud_user import create_user, update_user
+from api.dependencies import user_token
+from api.dependencies.helpers import create_access_token
+from api.dependencies.user_token import get_user_token
+from core.schema.user import UserCreate, UserUpdate
+from utils import denylist
+from utils.denylist import Watermarks
+from utils.user_cache import user_cache
+
+
+async def register(fabric, email: str = "a@example.com"):
+    async with fabric() as session:
+        return await create_user(
+            session=session,
+            data_user=UserCreate(email=email, password="password", name="A"),
+        )
+
+
+def test_profile_change_drops_cached_snapshot(database):
+    async def scenario():
+        user = await register(database)
+        # Другой процесс уже синхронизировался и закэшировал снимок
+        await sync_revocations(rebuild=True)
+        await user_cache.set(user)
+        async with database() as session:
+            await update_user(
+                session=session,
+                user=user,
+                data_user=UserUpdate(name="B"),
+            )
+        # update_user сбросил только свой кэш - возвращаем чужой снимок
+        await user_cache.set(user)
+        await sync_revocations()
+        return await user_cache.get(user.email)
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_profile_change_reaches_claims_in_other_worker(database, monkeypatch):
+    other_worker = Watermarks(max_token_lifetime=900)
+    monkeypatch.setattr(crud_token, "profile_watermarks", other_worker)
+    monkeypatch.setattr(user_token, "profile_watermarks", other_worker)
+
+    async def scenario():
+        user = await register(database)
+        token = create_access_token(user)
+        async with database() as session:
+            await update_user(
+                session=session,
+                user=user,
+                data_user=UserUpdate(name="B"),
+            )
+        await sync_revocations(rebuild=True)
+        async with database() as session:
+            current, _ = await get_user_token(
+                session=session,
+                token=token,
+                stateless=True,
+            )
+        return current
+
+    assert asyncio.run(scenario()).name == "B"
+
+
+def test_email_change_revokes_old_tokens_in_other_worker(database, monkeypatch):
+    other_worker = Watermarks(max_token_lifetime=86400)
+    monkeypatch.setattr(denylist, "user_watermarks", other_worker)
+    monkeypatch.setattr(crud_token, "user_watermarks", other_worker)
+    monkeypatch.setattr(user_token, "user_watermarks", other_worker)
+    other_profiles = Watermarks(max_token_lifetime=900)
+    monkeypatch.setattr(crud_token, "profile_watermarks", other_profiles)
+    monkeypatch.setattr(user_token, "profile_watermarks", other_profiles)
+
+    async def scenario():
+        user = await register(database)
+        token = create_access_token(user)
+        async with database() as session:
+            await update_user(
+                session=session,
+                user=user,
+                data_user=UserUpdate(email="b@example.com"),
+            )
+        await sync_revocations(rebuild=True)
+        async with database() as session:
+            await get_user_token(session=session, token=token, stateless=True)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario())
+    assert error.value.status_code == 401
@@ -0,0 +1,50 @@
+"""
+Пакетный поиск пользователей по почтам (интроспекция): без учета регистра,
+сначала кэш, промахи - одним запросом
+"""
+
+import asyncio
+
+from api.CRUD.crud_user import create_user, get_user_snapshots_by_emails
+from core.schema.user import UserCreate
+from utils.user_cache import user_cache
+
+
+def test_batch_lookup_ignores_email_case(database):
+    async def scenario():
+        async with database() as session:
+            user = await create_user(
+                session=session,
+                data_user=UserCreate(
+                    email="Alice@example.com", password="password", name="A"
+                ),
+            )
+        emails = ["alice@example.com", "ALICE@example.com", "bob@example.com"]
+        async with database() as session:
+            found = await get_user_snapshots_by_emails(session=session, emails=emails)
+        return user, found
+
+    user, found = asyncio.run(scenario())
+    assert found == {"alice@example.com": user, "ALICE@example.com": user}
+
+
+def test_batch_lookup_reads_cache_in_one_call(database, monkeypatch):
+    async def scenario():
+        async with database() as session:
+            user = await create_user(
+                session=session,
+                data_user=UserCreate(
+                    email="a@example.com", password="password", name="A"
+                ),
+            )
+        await user_cache.set(user)
+        # Кэш читается одним get_many, а не get по каждой почте
+        monkeypatch.setattr(user_cache, "get", None)
+        async with database() as session:
+            found = await get_user_snapshots_by_emails(
+                session=session, emails=[user.email]
+            )
+        return user, found
+
+    user, found = asyncio.run(scenario())
+    assert found == {user.email: user}
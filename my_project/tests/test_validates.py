@@ -0,0 +1,48 @@
+import pytest
+
+from utils.validates import (
+    argon2_hash,
+    bcrypt_hash,
+    scrypt_hash,
+    validates_password,
+)
+
+PASSWORD = "correct-password"
+
+
+HASHERS = {
+    "bcrypt": lambda: bcrypt_hash(PASSWORD, rounds=4),
+    "scrypt": lambda: scrypt_hash(PASSWORD, n=2**10, r=8, p=1),
+    "argon2": lambda: argon2_hash(
+        PASSWORD, time_cost=1, memory_cost=1024, parallelism=1
+    ),
+}
+
+
+@pytest.mark.parametrize("scheme", HASHERS)
+def test_password_matches_its_hash(scheme):
+    if scheme == "argon2":
+        pytest.importorskip("argon2")
+    stored = HASHERS[scheme]()
+    assert validates_password(PASSWORD, stored)
+    assert not validates_password("wrong-password", stored)
+
+
+@pytest.mark.parametrize(
+    "password_hash",
+    [
+        "$scrypt$ln=10,r=8,p=1$c2FsdA",
+        "$scrypt$ln=10,r=8$c2FsdA$aGFzaA",
+        "$scrypt$ln=x,r=8,p=1$c2FsdA$aGFzaA",
+        "$scrypt$ln=10,r=8,p=1$c2FsdA$a",
+        "$scrypt$ln=10,r=0,p=1$c2FsdA$aGFzaA",
+        "$scrypt$",
+        "$2b$12$truncated",
+        "not-a-hash",
+        "$argon2id$v=19$m=65536,t=3,p=4$garbage",
+    ],
+)
+def test_corrupt_hash_is_rejected(password_hash):
+    if password_hash.startswith("$argon2"):
+        pytest.importorskip("argon2")
+    assert validates_password(PASSWORD, password_hash) is False
@@ -0,0 +1,161 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import suppress
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from core.config import setting, AuditConfig
+
+EVENT_LOGIN = "login"
+EVENT_REFRESH = "refresh"
+
+OUTCOME_SUCCESS = "success"
+OUTCOME_FAILURE = "failure"
+OUTCOME_THROTTLED = "throttled"
+
+
+class AuditEvent(NamedTuple):
+    # Поля совпадают с колонками AuthEvents: кортеж уходит в COPY как есть
+    occurred_at: datetime
+    event: str
+    outcome: str
+    user_id: int | None
+    username: str | None
+    ip: str | None
+    jti: str | None
+    family: str | None
+    reason: str | None
+    duration_ms: float | None
+
+
+class AuditQueue:
+    """
+    Ограниченная очередь событий аудита в памяти рабочего процесса.
+    record() не ждет ввода-вывода: в базу события пишет фоновая задача
+    пачками (api/CRUD/crud_audit.py). Переполненная очередь не растет
+    и не замедляет вход: события выборочно сохраняются или отбрасываются,
+    потери видны в stats().
+    """
+
+    def __init__(self, config: AuditConfig):
+        self.config = config
+        self._events: deque[AuditEvent] = deque()
+        self._ready = asyncio.Event()
+        # Размер пачки, взятой из очереди и еще не записанной
+        self.in_flight = 0
+        # События принимаются между open() и close()
+        self.accepting = False
+        self.recorded = 0
+        self.sampled_out = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def open(self) -> None:
+        # Event создается в цикле событий рабочего процесса
+        self._ready = asyncio.Event()
+        self.accepting = True
+
+    def close(self) -> None:
+        """Новые события больше не принимаются, фоновая задача дописывает очередь"""
+        self.accepting = False
+        self._ready.set()
+
+    def _admit(self, outcome: str) -> bool:
+        size = len(self._events)
+        if size >= self.config.max_queue:
+            self.dropped += 1
+            return False
+        if (
+            self.config.overflow == "sample"
+            and outcome == OUTCOME_SUCCESS
+            and size >= self.config.max_queue * self.config.sample_watermark
+            and random.random() >= self.config.sample_rate
+        ):
+            self.sampled_out += 1
+            return False
+        return True
+
+    def record(
+        self,
+        event: str,
+        outcome: str,
+        started: float | None = None,
+        user_id: int | None = None,
+        username: str | None = None,
+        ip: str | None = None,
+        jti: str | None = None,
+        family: str | None = None,
+        reason: str | None = None,
+    ) -> None:
+        """
+        Ставим событие в очередь
+        args:
+            event: str - login / refresh
+            outcome: str - success / failure / throttled
+            started: float | None - time.perf_counter() начала обработки запроса
+        """
+        if not self.accepting or not self._admit(outcome):
+            return
+        self.recorded += 1
+        self._events.append(
+            AuditEvent(
+                occurred_at=datetime.now(timezone.utc),
+                event=event,
+                outcome=outcome,
+                user_id=user_id,
+                username=username[:320] if username else username,
+                ip=ip,
+                jti=jti,
+                family=family,
+                reason=str(reason)[:128] if reason else None,
+                duration_ms=(
+                    (time.perf_counter() - started) * 1000
+                    if started is not None
+                    else None
+                ),
+            )
+        )
+        if len(self._events) >= self.config.batch_size:
+            self._ready.set()
+
+    async def wait(self, timeout: float) -> None:
+        """Ждем полную пачку, закрытия очереди или timeout секунд"""
+        if len(self._events) >= self.config.batch_size or not self.accepting:
+            return
+        self._ready.clear()
+        with suppress(TimeoutError):
+            await asyncio.wait_for(self._ready.wait(), timeout)
+
+    def take(self, limit: int) -> list[AuditEvent]:
+        count = min(limit, len(self._events))
+        return [self._events.popleft() for _ in range(count)]
+
+    def discard(self) -> int:
+        """Неписанные события (очередь и прерванную пачку) считаем потерянными"""
+        lost = len(self._events) + self.in_flight
+        self._events.clear()
+        self.in_flight = 0
+        self.dropped += lost
+        return lost
+
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._events),
+            "in_flight": self.in_flight,
+            "recorded": self.recorded,
+            "sampled_out": self.sampled_out,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+audit_queue = AuditQueue(config=setting.audit)
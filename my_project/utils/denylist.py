@@ -0,0 +1,112 @@
+import math
+import time
+from typing import Callable
+
+from core.config import setting
+
+
+class Denylist:
+    """
+    Отозванные jti, разложенные по корзинам времени истечения (exp).
+    Проверка - одна корзина по exp токена и поиск в множестве.
+    Корзина удаляется целиком, когда истекли все токены в ней,
+    поэтому память ограничена отзывами за время жизни токена.
+    """
+
+    def __init__(
+        self, bucket_seconds: int = 60, clock: Callable[[], float] = time.time
+    ):
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock
+        self._buckets: dict[int, set[str]] = {}
+        self._purged_bucket = 0
+
+    def _bucket(self, exp: float) -> int:
+        return math.ceil(exp / self.bucket_seconds)
+
+    def _purge(self) -> None:
+        # Корзина n хранит токены с exp <= n * bucket_seconds
+        current = int(self.clock() // self.bucket_seconds)
+        if current == self._purged_bucket:
+            return
+        self._purged_bucket = current
+        for bucket in [bucket for bucket in self._buckets if bucket <= current]:
+            del self._buckets[bucket]
+
+    def add(self, jti: str, exp: float) -> None:
+        if exp <= self.clock():
+            return
+        self._purge()
+        self._buckets.setdefault(self._bucket(exp), set()).add(jti)
+
+    def contains(self, jti: str, exp: float) -> bool:
+        bucket = self._buckets.get(self._bucket(exp))
+        return bucket is not None and jti in bucket
+
+    def stats(self) -> dict:
+        self._purge()
+        return {
+            "buckets": len(self._buckets),
+            "size": sum(len(bucket) for bucket in self._buckets.values()),
+        }
+
+
+class Watermarks:
+    """
+    Для пользователя: токены, выданные не позже отметки (iat), недействительны
+    (или, для profile_watermarks, несут устаревшие claims).
+    Отметка хранится, пока может существовать выданный до нее токен.
+    """
+
+    def __init__(
+        self, max_token_lifetime: float, clock: Callable[[], float] = time.time
+    ):
+        self.max_token_lifetime = max_token_lifetime
+        self.clock = clock
+        # ключ пользователя -> отметка в секундах (как iat)
+        self._marks: dict[str, int] = {}
+
+    def set(self, key: str, issued_before: float) -> None:
+        mark = int(issued_before)
+        if mark > self._marks.get(key, 0):
+            self._marks[key] = mark
+
+    def is_revoked(self, key: str | None, iat: float | None) -> bool:
+        mark = self._marks.get(key)
+        if mark is None:
+            return False
+        # Токен без iat нельзя сравнить с отметкой - считаем отозванным
+        return iat is None or iat <= mark
+
+    def purge(self) -> None:
+        oldest = self.clock() - self.max_token_lifetime
+        self._marks = {key: mark for key, mark in self._marks.items() if mark >= oldest}
+
+    def stats(self) -> dict:
+        return {"size": len(self._marks)}
+
+
+token_denylist = Denylist(bucket_seconds=setting.revocation.denylist_bucket_seconds)
+# По uid: почта может смениться, а токены со старой почтой в sub - остаться.
+# Токены без uid (выданные до его появления в refresh-токенах) проверяются
+# по sub, поэтому отметка ставится и по почте
+user_watermarks = Watermarks(
+    max_token_lifetime=setting.auth_jwt.refresh_token_expire_days * 86400,
+)
+# По uid: профиль изменен - пользователя из claims access токенов, выданных
+# до изменения, читаем из базы
+profile_watermarks = Watermarks(
+    max_token_lifetime=setting.auth_jwt.access_token_expire_minutes * 60,
+)
+
+
+def watermark_key(payload: dict) -> str | None:
+    """Ключ отметок пользователя для токена: uid, у старых токенов - sub"""
+    user_id = payload.get("uid")
+    return str(user_id) if user_id is not None else payload.get("sub")
+
+
+def revoke_user_marks(user_id: int, email: str, issued_before: float) -> None:
+    """Отметка отзыва всех токенов пользователя: по uid и по почте"""
+    user_watermarks.set(str(user_id), issued_before)
+    user_watermarks.set(email, issued_before)
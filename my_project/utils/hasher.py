@@ -0,0 +1,104 @@
+import asyncio
+import random
+import secrets
+import time
+from collections import deque
+from typing import Any, Callable, TypeVar
+
+from core.config import setting
+from utils.metrics import timed
+from utils.validates import hash_password, validates_password
+from utils.workers import WorkerPool
+
+T = TypeVar("T")
+
+
+def run_timed(func: Callable[..., T], *args: Any) -> tuple[T, float]:
+    """Выполняем func в рабочем потоке/процессе и меряем только само выполнение"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+class PasswordHasher:
+    """
+    Асинхронная обертка над bcrypt: хэширование и проверка пароля
+    выполняются в пуле, не блокируя event loop
+    """
+
+    def __init__(
+        self,
+        pool: WorkerPool,
+        timing_samples: int = 256,
+        bulk_max_workers: int | None = None,
+    ):
+        self.pool = pool
+        # Массовое хэширование занимает не больше bulk_max_workers слотов пула
+        self._bulk_slots = asyncio.Semaphore(
+            bulk_max_workers or max(1, pool.max_workers // 2)
+        )
+        # Время выполнения недавних проверок (без ожидания в очереди пула)
+        self._timings: deque[float] = deque(maxlen=timing_samples)
+        self._dummy_hash: str | None = None
+
+    async def hash(self, password: str) -> str:
+        return await self.pool.run(hash_password, password)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        """
+        Хэшируем пачку паролей параллельно: одна задача пула - один пароль,
+        одновременно не больше bulk_max_workers задач, чтобы входы
+        не ждали за импортом в очереди пула
+        """
+
+        async def hash_one(password: str) -> str:
+            async with self._bulk_slots:
+                return await self.pool.run(hash_password, password)
+
+        return list(await asyncio.gather(*(hash_one(item) for item in passwords)))
+
+    @timed("validates_password")
+    async def verify(self, password: str, password_hash: str) -> bool:
+        result, elapsed = await self.pool.run(
+            run_timed, validates_password, password, password_hash
+        )
+        self._timings.append(elapsed)
+        return result
+
+    async def verify_dummy(self, password: str, mode: str) -> None:
+        """
+        Имитируем проверку пароля для несуществующего пользователя,
+        чтобы время ответа не выдавало, есть ли такой аккаунт
+        args:
+            password: str - Пароль из запроса
+            mode: str - off, dummy_hash или sleep
+        """
+        if mode == "off":
+            return
+        # Пока замеров нет, выравниваем настоящей проверкой (она же их и наберет)
+        if mode == "dummy_hash" or not self._timings:
+            if self._dummy_hash is None:
+                self._dummy_hash = await self.hash(secrets.token_urlsafe(16))
+            await self.verify(password, self._dummy_hash)
+            return
+        # Пауза занимает слот пула, как настоящая проверка: под нагрузкой
+        # она так же ждет в очереди и так же получает 503 при переполнении
+        await self.pool.run(time.sleep, random.choice(self._timings))
+
+    def stats(self) -> dict:
+        return self.pool.stats()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.pool.shutdown(wait=wait)
+
+
+password_hasher = PasswordHasher(
+    pool=WorkerPool(
+        name="hashing",
+        kind=setting.hashing.executor,
+        max_workers=setting.hashing.max_workers,
+        max_queue=setting.hashing.max_queue,
+    ),
+    timing_samples=setting.hashing.timing_samples,
+    bulk_max_workers=setting.hashing.bulk_max_workers,
+)
@@ -0,0 +1,91 @@
+import asyncio
+
+import jwt
+from jwt.exceptions import InvalidTokenError
+
+from core.config import setting
+from utils.keys import key_manager
+from utils.token_cache import token_cache
+from utils.validates import Signer
+from utils.workers import WorkerPool
+
+
+def decode_batch(items: list[tuple[Signer, str]]) -> list[dict | None]:
+    """Проверяем подписи части пачки (выполняется в пуле)"""
+    payloads = []
+    for signer, token in items:
+        try:
+            payloads.append(signer.decode(token))
+        except InvalidTokenError:
+            payloads.append(None)
+    return payloads
+
+
+class TokenVerifier:
+    """
+    Проверка подписей пачки токенов в пуле потоков.
+    Кэш проверенных токенов и выбор ключа по kid - в event loop,
+    в пул уходит только проверка подписи, частями по chunk_size токенов
+    """
+
+    def __init__(self, pool: WorkerPool, chunk_size: int = 32):
+        self.pool = pool
+        self.chunk_size = chunk_size
+
+    async def verify_many(self, tokens: list[str]) -> list[dict | None]:
+        """
+        Проверяем пачку токенов
+        args:
+            tokens: list[str] - Токены
+        return:
+            payloads: list[dict | None] - Payload по каждому токену, None - недействителен
+        """
+        payloads: list[dict | None] = [None] * len(tokens)
+        pending: list[tuple[int, Signer, str]] = []
+        for index, token in enumerate(tokens):
+            payload = token_cache.get(token)
+            if payload is not None:
+                payloads[index] = payload
+                continue
+            try:
+                kid = jwt.get_unverified_header(token).get("kid")
+                signer = key_manager.get_verifier(kid)
+            except InvalidTokenError:
+                continue
+            pending.append((index, signer, token))
+        if not pending:
+            return payloads
+        parts = max(1, min(self.pool.max_workers, len(pending) // self.chunk_size))
+        step = -(-len(pending) // parts)
+        chunks = [pending[i : i + step] for i in range(0, len(pending), step)]
+        decoded = await asyncio.gather(
+            *(
+                self.pool.run(
+                    decode_batch, [(signer, token) for _, signer, token in chunk]
+                )
+                for chunk in chunks
+            )
+        )
+        for chunk, chunk_payloads in zip(chunks, decoded):
+            for (index, _, token), payload in zip(chunk, chunk_payloads):
+                if payload is None or not payload.get("sub"):
+                    continue
+                token_cache.set(token, payload)
+                payloads[index] = payload
+        return payloads
+
+    def stats(self) -> dict:
+        return self.pool.stats()
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.pool.shutdown(wait=wait)
+
+
+token_verifier = TokenVerifier(
+    pool=WorkerPool(
+        name="introspection",
+        max_workers=setting.introspection.max_workers,
+        max_queue=setting.introspection.max_queue,
+    ),
+    chunk_size=setting.introspection.chunk_size,
+)
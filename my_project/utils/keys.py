@@ -0,0 +1,227 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+import jwt
+from jwt.exceptions import InvalidKeyError, InvalidTokenError
+
+from core.config import JWTKey, setting
+from utils.validates import Signer
+
+log = logging.getLogger(__name__)
+
+# Алгоритмы с общим секретом: ключ берется из настроек, а не из PEM-файлов
+HMAC_ALGORITHMS = frozenset({"HS256", "HS384", "HS512"})
+
+
+class KeyFile:
+    """
+    PEM-файл ключа.
+    Перечитывается с диска только если у файла изменились mtime/size.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.pem: bytes | None = None
+        self._stamp: tuple[int, int] | None = None
+
+    def _file_stamp(self) -> tuple[int, int]:
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def load(self) -> None:
+        stamp = self._file_stamp()
+        self.pem = self.path.read_bytes()
+        self._stamp = stamp
+
+    def changed(self) -> bool:
+        return self._file_stamp() != self._stamp
+
+
+def public_jwk(signer: Signer) -> dict | None:
+    """JWK публичного ключа; для симметричных алгоритмов - None"""
+    if signer.algorithm in HMAC_ALGORITHMS:
+        return None
+    jwk = jwt.get_algorithm_by_name(signer.algorithm).to_jwk(
+        signer.verifying_key, as_dict=True
+    )
+    jwk.update(kid=signer.kid, alg=signer.algorithm, use="sig")
+    return jwk
+
+
+class KeyManager:
+    """
+    Ключевое кольцо JWT: ключи в виде Signer.
+    Подписывает активный ключ, проверка выбирает ключ по kid из заголовка.
+    Файлы ключей периодически (не чаще reload_interval) проверяются
+    на изменения; после замены ключа прежний остается для проверки,
+    чтобы уже выданные токены не стали недействительными.
+    Ключи из retiring_keys только проверяют токены.
+    Публичные ключи кольца отдаются в виде готового JWKS-документа,
+    который пересобирается только при смене ключей.
+    """
+
+    def __init__(
+        self,
+        private_key_path: Path,
+        public_key_path: Path,
+        algorithm: str,
+        reload_interval: float | None = None,
+        kid: str | None = None,
+        secret_key: bytes | None = None,
+        previous_keys: int = 1,
+        retiring_keys: list[JWTKey] | None = None,
+    ):
+        self.algorithm = algorithm
+        self.reload_interval = reload_interval
+        self.kid = kid
+        self.secret_key = secret_key
+        self.previous_keys = previous_keys
+        self._private = KeyFile(path=private_key_path)
+        self._public = KeyFile(path=public_key_path)
+        self._signer: Signer | None = None
+        self._verifiers: dict[str, Signer] = {}
+        self._retiring_config = retiring_keys or []
+        self._retiring: dict[str, Signer] = {}
+        self._jwks: bytes = b'{"keys":[]}'
+        self._jwks_etag: str = ""
+        self._checked_at: float | None = None
+        self._reload_listeners: list[Callable[[], None]] = []
+
+    def add_reload_listener(self, listener: Callable[[], None]) -> None:
+        self._reload_listeners.append(listener)
+
+    def _build_signer(self) -> Signer:
+        if self.algorithm in HMAC_ALGORITHMS:
+            if not self.secret_key:
+                raise InvalidKeyError(f"{self.algorithm} requires a secret key")
+            return Signer.from_secret(
+                algorithm=self.algorithm,
+                secret=self.secret_key,
+                kid=self.kid,
+            )
+        self._private.load()
+        self._public.load()
+        return Signer.from_pem(
+            algorithm=self.algorithm,
+            public_pem=self._public.pem,
+            private_pem=self._private.pem,
+            kid=self.kid,
+        )
+
+    def _activate(self, signer: Signer) -> None:
+        previous = [
+            verifier for kid, verifier in self._verifiers.items() if kid != signer.kid
+        ]
+        # Самые старые ключи вытесняются первыми
+        keep = (
+            previous[len(previous) - self.previous_keys :] if self.previous_keys else []
+        )
+        self._verifiers = {verifier.kid: verifier for verifier in keep}
+        self._verifiers[signer.kid] = signer
+        self._signer = signer
+        self._publish()
+
+    def _load_retiring(self) -> None:
+        retiring = {}
+        for key in self._retiring_config:
+            key_file = KeyFile(path=key.public_key_path)
+            key_file.load()
+            signer = Signer.from_pem(
+                algorithm=key.algorithm or self.algorithm,
+                public_pem=key_file.pem,
+                kid=key.kid,
+            )
+            retiring[signer.kid] = signer
+        self._retiring = retiring
+
+    def _publish(self) -> None:
+        """Собираем JWKS один раз; ETag - хэш тела документа"""
+        signers = {**self._retiring, **self._verifiers}
+        keys = [jwk for jwk in map(public_jwk, signers.values()) if jwk]
+        body = json.dumps({"keys": keys}, separators=(",", ":")).encode()
+        self._jwks = body
+        self._jwks_etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+    @property
+    def loaded(self) -> bool:
+        return self._signer is not None
+
+    def load(self) -> None:
+        self._load_retiring()
+        self._activate(self._build_signer())
+        self._checked_at = time.monotonic()
+
+    def _files_changed(self) -> bool:
+        if self.algorithm in HMAC_ALGORITHMS:
+            return False
+        return self._private.changed() or self._public.changed()
+
+    def _refresh(self) -> None:
+        if self._checked_at is None:
+            self.load()
+            return
+        if self.reload_interval is None:
+            return
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return
+        self._checked_at = now
+        try:
+            if not self._files_changed():
+                return
+            signer = self._build_signer()
+        except (OSError, ValueError, InvalidKeyError) as exc:
+            # Файл мог быть записан не полностью - оставляем старый ключ
+            log.warning("Failed to reload JWT keys: %s", exc)
+            return
+        log.info("Reloaded JWT keys, active kid=%s", signer.kid)
+        self._activate(signer)
+        for listener in self._reload_listeners:
+            listener()
+
+    @property
+    def signer(self) -> Signer:
+        """Активный ключ подписи"""
+        self._refresh()
+        return self._signer
+
+    def get_verifier(self, kid: str | None) -> Signer:
+        """
+        Ключ для проверки токена по kid из заголовка.
+        Токены без kid (выданные до появления kid) проверяются активным ключом.
+        """
+        self._refresh()
+        if kid is None:
+            return self._signer
+        verifier = None
+        if isinstance(kid, str):
+            verifier = self._verifiers.get(kid) or self._retiring.get(kid)
+        if verifier is None:
+            raise InvalidTokenError(f"Unknown key id {kid!r}")
+        return verifier
+
+    def jwks(self) -> tuple[bytes, str]:
+        """JWKS-документ и его ETag"""
+        self._refresh()
+        return self._jwks, self._jwks_etag
+
+
+key_manager = KeyManager(
+    private_key_path=setting.auth_jwt.private_key_path,
+    public_key_path=setting.auth_jwt.public_key_path,
+    algorithm=setting.auth_jwt.algorithm,
+    reload_interval=setting.auth_jwt.key_reload_interval,
+    kid=setting.auth_jwt.kid,
+    secret_key=(
+        setting.auth_jwt.secret_key.get_secret_value().encode()
+        if setting.auth_jwt.secret_key
+        else None
+    ),
+    previous_keys=setting.auth_jwt.previous_keys,
+    retiring_keys=setting.auth_jwt.retiring_keys,
+)
@@ -0,0 +1,44 @@
+from typing import AsyncIterable, AsyncIterator
+
+from fastapi import HTTPException, status
+
+
+async def limit_bytes(
+    chunks: AsyncIterable[bytes],
+    max_bytes: int,
+) -> AsyncIterator[bytes]:
+    """
+    Пропускаем поток, пока он не длиннее max_bytes, иначе отвечаем 413
+    args:
+        chunks: AsyncIterable[bytes] - Поток байтов (например, request.stream())
+        max_bytes: int - Наибольший размер потока
+    return:
+        chunks: AsyncIterator[bytes] - Тот же поток
+    """
+    received = 0
+    async for chunk in chunks:
+        received += len(chunk)
+        if received > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Request body is larger than {max_bytes} bytes",
+            )
+        yield chunk
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Разбиваем поток байтов на строки, не загружая весь поток в память
+    args:
+        chunks: AsyncIterable[bytes] - Поток байтов (например, request.stream())
+    return:
+        lines: AsyncIterator[bytes] - Строки без символа перевода строки
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
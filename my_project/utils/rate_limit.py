@@ -0,0 +1,238 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from core.config import setting, RateLimitConfig
+from utils.metrics import registry
+
+log = logging.getLogger(__name__)
+
+LOGIN_REJECTED = registry.counter(
+    "auth_login_rejected",
+    "Login attempts rejected before password verification",
+    ("reason",),
+)
+
+# Token bucket в Redis: атомарно пополняем и забираем одну попытку.
+# Возвращает, через сколько миллисекунд попытка станет доступна (0 - сейчас)
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) / rate * 1000)
+end
+redis.call("HSET", KEYS[1], "tokens", tokens, "ts", now)
+redis.call("PEXPIRE", KEYS[1], math.ceil(burst / rate * 1000))
+return wait
+"""
+
+
+def lockout_seconds(config: RateLimitConfig, failures: int) -> float:
+    """Экспоненциальная блокировка после lockout_threshold неудач"""
+    if failures < config.lockout_threshold:
+        return 0.0
+    return min(
+        config.lockout_max,
+        config.lockout_base * 2 ** (failures - config.lockout_threshold),
+    )
+
+
+class MemoryLimiterStore:
+    """Состояние ограничителя в памяти процесса, не больше max_keys ключей"""
+
+    def __init__(self, config: RateLimitConfig, clock: Callable[[], float]):
+        self.config = config
+        self.clock = clock
+        # key -> [tokens, updated_at]
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        # key -> [failures, last_failure_at, locked_until]
+        self._failures: OrderedDict[str, list[float]] = OrderedDict()
+
+    def _remember(self, store: OrderedDict, key: str, value: list[float]) -> None:
+        store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.config.max_keys:
+            store.popitem(last=False)
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = self.clock()
+        tokens, updated_at = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated_at) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._remember(self._buckets, key, [tokens, now])
+        return wait
+
+    async def locked_for(self, key: str) -> float:
+        state = self._failures.get(key)
+        if state is None:
+            return 0.0
+        return max(0.0, state[2] - self.clock())
+
+    async def fail(self, key: str) -> None:
+        now = self.clock()
+        failures, last_failure_at, _ = self._failures.get(key, (0, now, 0.0))
+        if now - last_failure_at > self.config.failure_window:
+            failures = 0
+        failures += 1
+        locked_until = now + lockout_seconds(self.config, failures)
+        self._remember(self._failures, key, [failures, now, locked_until])
+
+    async def reset(self, key: str) -> None:
+        self._failures.pop(key, None)
+
+    async def close(self) -> None:
+        pass
+
+    def size(self) -> int:
+        return len(self._buckets) + len(self._failures)
+
+
+class RedisLimiterStore:
+    """Общее для всех процессов состояние ограничителя в Redis"""
+
+    def __init__(self, config: RateLimitConfig, clock: Callable[[], float]):
+        # redis импортируется, только если выбран: импорт занимает ~0.1 с
+        try:
+            from redis import asyncio as aioredis
+        except ImportError:  # redis - необязательная зависимость
+            raise RuntimeError(
+                "rate_limit.backend='redis' requires the 'redis' package"
+            ) from None
+        self.config = config
+        self.clock = clock
+        self._redis = aioredis.from_url(config.redis_url)
+        self._token_bucket = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def _key(self, kind: str, key: str) -> str:
+        return f"{self.config.key_prefix}{kind}:{key}"
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        wait_ms = await self._token_bucket(
+            keys=[self._key("bucket", key)],
+            args=[rate, burst, self.clock()],
+        )
+        return int(wait_ms) / 1000
+
+    async def locked_for(self, key: str) -> float:
+        ttl_ms = await self._redis.pttl(self._key("lock", key))
+        return max(0, ttl_ms) / 1000
+
+    async def fail(self, key: str) -> None:
+        failures_key = self._key("fail", key)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.incr(failures_key)
+            pipe.expire(failures_key, int(self.config.failure_window))
+            failures, _ = await pipe.execute()
+        lockout = lockout_seconds(self.config, failures)
+        if lockout:
+            await self._redis.set(
+                self._key("lock", key), 1, px=max(1, int(lockout * 1000))
+            )
+
+    async def reset(self, key: str) -> None:
+        await self._redis.delete(self._key("fail", key), self._key("lock", key))
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+    def size(self) -> int | None:
+        return None
+
+
+class LoginRateLimiter:
+    """
+    Ограничение попыток входа до проверки пароля:
+    token bucket на IP и на аккаунт, экспоненциальная блокировка пары
+    IP + аккаунт после серии неудач. Лишние попытки отклоняются
+    без bcrypt, поэтому атака перебором не съедает CPU пула хэширования.
+    Ошибки Redis не ломают вход: попытка пропускается.
+    """
+
+    def __init__(self, config: RateLimitConfig, clock: Callable[[], float] = time.time):
+        self.config = config
+        self.errors = 0
+        if config.backend == "redis":
+            self._store = RedisLimiterStore(config=config, clock=clock)
+        else:
+            self._store = MemoryLimiterStore(config=config, clock=clock)
+
+    @staticmethod
+    def _pair(ip: str, account: str) -> str:
+        return f"{account.lower()}|{ip}"
+
+    async def check(self, ip: str, account: str) -> float:
+        """
+        Проверяем попытку входа
+        args:
+            ip: str - Адрес клиента
+            account: str - Логин (почта)
+        return:
+            retry_after: float - Через сколько секунд повторить (0 - можно сейчас)
+        """
+        if not self.config.enabled:
+            return 0.0
+        try:
+            locked = await self._store.locked_for(self._pair(ip, account))
+            if locked:
+                LOGIN_REJECTED.inc("lockout")
+                return locked
+            wait = await self._store.take(
+                f"ip:{ip}", self.config.ip_rate, self.config.ip_burst
+            )
+            if not wait:
+                wait = await self._store.take(
+                    f"account:{account.lower()}",
+                    self.config.account_rate,
+                    self.config.account_burst,
+                )
+        except Exception as exc:
+            self.errors += 1
+            log.warning("Rate limiter check failed: %s", exc)
+            return 0.0
+        if wait:
+            LOGIN_REJECTED.inc("rate")
+        return wait
+
+    async def record_failure(self, ip: str, account: str) -> None:
+        if not self.config.enabled:
+            return
+        try:
+            await self._store.fail(self._pair(ip, account))
+        except Exception as exc:
+            self.errors += 1
+            log.warning("Rate limiter update failed: %s", exc)
+
+    async def record_success(self, ip: str, account: str) -> None:
+        if not self.config.enabled:
+            return
+        try:
+            await self._store.reset(self._pair(ip, account))
+        except Exception as exc:
+            self.errors += 1
+            log.warning("Rate limiter update failed: %s", exc)
+
+    async def close(self) -> None:
+        await self._store.close()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.config.backend,
+            "size": self._store.size(),
+            "errors": self.errors,
+        }
+
+
+login_limiter = LoginRateLimiter(config=setting.rate_limit)
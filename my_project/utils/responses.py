@@ -0,0 +1,48 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
+
+try:
+    import orjson
+except ImportError:  # orjson - необязательная зависимость
+    orjson = None
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON-ответ через orjson, если он установлен, иначе через json"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ModelResponse(JSONResponse):
+    """
+    Ответ из уже готовой pydantic-модели: сериализуется один раз
+    в pydantic-core (model_dump_json), без повторной валидации
+    через response_model и без jsonable_encoder
+    """
+
+    def __init__(
+        self,
+        content: BaseModel,
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+        background: BackgroundTask | None = None,
+        exclude_none: bool = False,
+    ):
+        self.exclude_none = exclude_none
+        super().__init__(
+            content=content,
+            status_code=status_code,
+            headers=headers,
+            background=background,
+        )
+
+    def render(self, content: BaseModel) -> bytes:
+        return content.__pydantic_serializer__.to_json(
+            content, exclude_none=self.exclude_none
+        )
@@ -0,0 +1,69 @@
+from datetime import datetime
+from typing import Iterable
+
+from core.config import setting
+from utils.bloom import BloomFilter
+
+
+class RevocationFilter:
+    """
+    Фильтр Блума перед таблицей отозванных токенов.
+    Если ни jti, ни семейства токена нет в фильтре - токен не отзывался,
+    и база данных не нужна. Фильтр пополняется при отзыве в этом процессе
+    и периодической синхронизацией с таблицей (отзывы других процессов).
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.bloom = BloomFilter(capacity=capacity, error_rate=error_rate)
+        # revoked_at последней прочитанной из таблицы записи
+        self.synced_at: datetime | None = None
+        # До первой удачной синхронизации фильтр пуст и ничего не исключает:
+        # все токены проверяются по базе
+        self.ready = False
+        self.checks = 0
+        self.positives = 0
+        self.rebuilds = 0
+
+    def might_contain(self, ids: Iterable[str]) -> bool:
+        self.checks += 1
+        if not self.ready:
+            return True
+        if any(item in self.bloom for item in ids):
+            self.positives += 1
+            return True
+        return False
+
+    def add(self, item: str) -> None:
+        # Синхронизация с запасом читает одни и те же записи повторно
+        if item not in self.bloom:
+            self.bloom.add(item)
+
+    def rebuild(self, ids: list[str], synced_at: datetime | None) -> None:
+        """Новый фильтр из всех неистекших записей (старые уже удалены)"""
+        bloom = BloomFilter(
+            capacity=max(self.capacity, 2 * len(ids)),
+            error_rate=self.error_rate,
+        )
+        for item in ids:
+            bloom.add(item)
+        self.bloom = bloom
+        self.synced_at = synced_at
+        self.rebuilds += 1
+
+    def stats(self) -> dict:
+        return {
+            "ready": int(self.ready),
+            "size": self.bloom.count,
+            "capacity": self.bloom.capacity,
+            "checks": self.checks,
+            "positives": self.positives,
+            "rebuilds": self.rebuilds,
+        }
+
+
+revocation_filter = RevocationFilter(
+    capacity=setting.revocation.bloom_capacity,
+    error_rate=setting.revocation.bloom_error_rate,
+)
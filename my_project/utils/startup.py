@@ -0,0 +1,156 @@
+import builtins
+import logging
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+# Модуль импортируется первым в main.py, поэтому зависит только от stdlib
+# и читает свой флаг из окружения напрямую: Settings еще не загружен
+PROFILE_IMPORTS_ENV = "APP_STARTUP_PROFILE_IMPORTS"
+
+log = logging.getLogger(__name__)
+
+
+def process_age() -> float | None:
+    """Сколько секунд назад запущен процесс (Linux), иначе None"""
+    try:
+        with open("/proc/self/stat") as stat:
+            # Поле 22 - момент запуска в тиках с загрузки системы
+            fields = stat.read().rsplit(")", 1)[1].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+        with open("/proc/uptime") as uptime:
+            return max(0.0, float(uptime.read().split()[0]) - started)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ImportProfiler:
+    """
+    Время импорта модулей через обертку над builtins.__import__.
+    Учитываются только абсолютные импорты еще не загруженных модулей;
+    модули, загруженные через importlib, попадают в собственное время родителя
+    """
+
+    def __init__(self):
+        # модуль -> собственное время импорта без вложенных модулей
+        self.self_seconds: dict[str, float] = {}
+        self._stack: list[float] = []
+        self._original = None
+
+    def install(self) -> None:
+        if self._original is None:
+            self._original = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original(name, globals, locals, fromlist, level)
+        self._stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._stack.pop()
+            self.self_seconds[name] = self.self_seconds.get(name, 0.0) + (
+                elapsed - children
+            )
+            if self._stack:
+                self._stack[-1] += elapsed
+
+    def by_package(self, top: int = 10) -> dict[str, float]:
+        """Время импорта по пакетам верхнего уровня, самые долгие первыми"""
+        packages: dict[str, float] = {}
+        for name, seconds in self.self_seconds.items():
+            package = name.split(".", 1)[0]
+            packages[package] = packages.get(package, 0.0) + seconds
+        ordered = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+        return dict(ordered[:top])
+
+
+class StartupProfiler:
+    """
+    Время запуска: импорт приложения, этапы lifespan и первый запрос.
+    Отсчет идет от запуска процесса (для рабочего после fork - от fork)
+    """
+
+    def __init__(self):
+        self._origin = time.perf_counter() - (process_age() or 0.0)
+        self.marks: dict[str, float] = {}
+        self.phases: dict[str, float] = {}
+        self.imports: ImportProfiler | None = None
+        self.reported = False
+
+    def profile_imports(self) -> None:
+        self.imports = ImportProfiler()
+        self.imports.install()
+
+    def restart(self) -> None:
+        """Рабочий процесс после fork: импорт уже сделан родителем"""
+        self._origin = time.perf_counter()
+        self.marks.clear()
+        self.phases.clear()
+        self.reported = False
+
+    def mark(self, name: str) -> None:
+        self.marks[name] = time.perf_counter() - self._origin
+        if name == "imported" and self.imports is not None:
+            self.imports.uninstall()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+    def log_report(self) -> None:
+        def seconds(values: dict[str, float]) -> str:
+            return ", ".join(f"{name} {value:.3f}s" for name, value in values.items())
+
+        log.info(
+            "Worker %s startup: %s; lifespan: %s",
+            os.getpid(),
+            seconds(self.marks),
+            seconds(self.phases),
+        )
+        if self.imports is not None:
+            log.info("Import time by package: %s", seconds(self.imports.by_package()))
+
+    def stats(self) -> dict:
+        return {
+            **{f"{name}_seconds": value for name, value in self.marks.items()},
+            **{f"phase_{name}_seconds": value for name, value in self.phases.items()},
+        }
+
+
+class StartupMiddleware:
+    """Отмечает окончание первого запроса и пишет отчет о запуске в лог"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if startup_profiler.reported or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if not startup_profiler.reported:
+                startup_profiler.reported = True
+                startup_profiler.mark("first_request")
+                startup_profiler.log_report()
+
+
+startup_profiler = StartupProfiler()
+if os.environ.get(PROFILE_IMPORTS_ENV, "").lower() in ("1", "true", "yes", "on"):
+    startup_profiler.profile_imports()
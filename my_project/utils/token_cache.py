@@ -0,0 +1,44 @@
+import hashlib
+
+from core.config import setting
+from utils.cache import LRUCache
+from utils.keys import key_manager
+
+
+class TokenCache:
+    """
+    Кэш уже проверенных токенов: ключ - sha256 от токена,
+    значение - расшифрованный payload, живет до exp токена
+    """
+
+    def __init__(self, max_size: int):
+        self._cache = LRUCache(max_size=max_size)
+
+    @staticmethod
+    def _digest(token: str | bytes) -> bytes:
+        if isinstance(token, str):
+            token = token.encode()
+        return hashlib.sha256(token).digest()
+
+    def get(self, token: str | bytes) -> dict | None:
+        return self._cache.get(self._digest(token))
+
+    def set(self, token: str | bytes, payload: dict) -> None:
+        exp = payload.get("exp")
+        if exp is None:
+            return
+        self._cache.set(self._digest(token), payload, expires_at=float(exp))
+
+    def invalidate(self, token: str | bytes) -> None:
+        self._cache.delete(self._digest(token))
+
+    def purge(self) -> None:
+        self._cache.purge()
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+token_cache = TokenCache(max_size=setting.auth_jwt.token_cache_size)
+# После смены ключей ранее проверенные токены нужно проверить заново
+key_manager.add_reload_listener(token_cache.purge)
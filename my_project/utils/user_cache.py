@@ -0,0 +1,126 @@
+import logging
+
+from core.config import setting, UserCacheConfig
+from core.schema.user import UserSnapshot
+from utils.cache import LRUCache
+
+log = logging.getLogger(__name__)
+
+
+class UserCache:
+    """
+    Read-through кэш снимков пользователей по email.
+    По умолчанию хранится в памяти процесса, опционально - в Redis.
+    Ошибки Redis не ломают запрос: они считаются промахом кэша.
+    """
+
+    def __init__(self, config: UserCacheConfig):
+        self.config = config
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._memory: LRUCache | None = None
+        self._redis = None
+        if config.backend == "redis":
+            # redis импортируется, только если выбран: импорт занимает ~0.1 с
+            try:
+                from redis import asyncio as aioredis
+            except ImportError:  # redis - необязательная зависимость
+                raise RuntimeError(
+                    "user_cache.backend='redis' requires the 'redis' package"
+                ) from None
+            self._redis = aioredis.from_url(config.redis_url)
+        else:
+            self._memory = LRUCache(
+                max_size=config.max_size,
+                ttl=config.ttl_seconds,
+            )
+
+    def _key(self, email: str) -> str:
+        return f"{self.config.key_prefix}{email}"
+
+    async def get(self, email: str) -> UserSnapshot | None:
+        if self._memory is not None:
+            user = self._memory.get(email)
+        else:
+            try:
+                raw = await self._redis.get(self._key(email))
+            except Exception as exc:
+                self.errors += 1
+                log.warning("User cache get failed: %s", exc)
+                raw = None
+            user = UserSnapshot.model_validate_json(raw) if raw else None
+        if user is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return user
+
+    async def get_many(self, emails: list[str]) -> dict[str, UserSnapshot]:
+        """Снимки по списку почт; в Redis - одним MGET. Промахов в ответе нет"""
+        if not emails:
+            return {}
+        if self._memory is not None:
+            found = {email: self._memory.get(email) for email in emails}
+        else:
+            try:
+                raws = await self._redis.mget([self._key(email) for email in emails])
+            except Exception as exc:
+                self.errors += 1
+                log.warning("User cache get_many failed: %s", exc)
+                raws = [None] * len(emails)
+            found = {
+                email: UserSnapshot.model_validate_json(raw) if raw else None
+                for email, raw in zip(emails, raws)
+            }
+        users = {email: user for email, user in found.items() if user is not None}
+        self.hits += len(users)
+        self.misses += len(found) - len(users)
+        return users
+
+    async def set(self, user: UserSnapshot) -> None:
+        if self._memory is not None:
+            self._memory.set(user.email, user)
+            return
+        try:
+            await self._redis.set(
+                self._key(user.email),
+                user.model_dump_json(),
+                ex=max(1, int(self.config.ttl_seconds)),
+            )
+        except Exception as exc:
+            self.errors += 1
+            log.warning("User cache set failed: %s", exc)
+
+    async def invalidate(self, email: str) -> None:
+        if self._memory is not None:
+            self._memory.delete(email)
+            return
+        try:
+            await self._redis.delete(self._key(email))
+        except Exception as exc:
+            self.errors += 1
+            log.warning("User cache invalidate failed: %s", exc)
+
+    async def purge(self) -> None:
+        if self._memory is not None:
+            self._memory.purge()
+            return
+        async for key in self._redis.scan_iter(match=f"{self.config.key_prefix}*"):
+            await self._redis.delete(key)
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.config.backend,
+            "size": len(self._memory) if self._memory is not None else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+
+user_cache = UserCache(config=setting.user_cache)
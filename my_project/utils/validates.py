@@ -1,18 +1,38 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
 import uuid
 from datetime import timedelta, datetime, timezone
+from typing import Any
+
 import jwt
+from jwt.exceptions import InvalidKeyError
 
 import bcrypt
 
+try:
+    from argon2 import PasswordHasher as Argon2Hasher, exceptions as argon2_exceptions
+except ImportError:  # argon2-cffi - необязательная зависимость
+    Argon2Hasher = None
+    argon2_exceptions = None
+
 from core.config import setting
+from utils.metrics import timed
+
+SCRYPT_PREFIX = "$scrypt$"
+ARGON2_PREFIX = "$argon2"
 
 
+@timed("encode_jwt")
 def encode_jwt(
     payload: dict,
-    private_key: str,
+    private_key: Any,
     algorithm: str,
     expire_minutes: int,
     expire_timedelta: timedelta | None = None,
+    kid: str | None = None,
 ) -> str:
     to_encode = payload.copy()
     now = datetime.now(timezone.utc)
@@ -29,13 +49,15 @@ def encode_jwt(
         to_encode,
         private_key,
         algorithm=algorithm,
+        headers={"kid": kid} if kid else None,
     )
     return encoded
 
 
+@timed("decode_jwt")
 def decode_jwt(
     token: str | bytes,
-    public_key: str,
+    public_key: Any,
     algorithm: str,
 ) -> dict:
     decoded = jwt.decode(
@@ -46,18 +68,266 @@ def decode_jwt(
     return decoded
 
 
-def hash_password(password: str) -> bytes:
-    salt = bcrypt.gensalt()
+# Обязательные поля JWK для отпечатка ключа (RFC 7638)
+THUMBPRINT_MEMBERS = {
+    "RSA": ("e", "kty", "n"),
+    "EC": ("crv", "kty", "x", "y"),
+    "OKP": ("crv", "kty", "x"),
+    "oct": ("k", "kty"),
+}
+
+
+def key_thumbprint(algorithm: str, key: Any) -> str:
+    """Отпечаток ключа по RFC 7638 - kid по умолчанию для асимметричных ключей"""
+    jwk = jwt.get_algorithm_by_name(algorithm).to_jwk(key, as_dict=True)
+    members = {name: jwk[name] for name in THUMBPRINT_MEMBERS[jwk["kty"]]}
+    canonical = json.dumps(members, separators=(",", ":"), sort_keys=True)
+    digest = hashlib.sha256(canonical.encode()).digest()
+    return base64.urlsafe_b64encode(digest).decode().rstrip("=")
+
+
+class Signer:
+    """
+    Ключ JWT с идентификатором kid: подпись и проверка токенов.
+    Поддерживает любой алгоритм PyJWT: RS256, ES256, EdDSA (Ed25519), HS256...
+    Без signing_key ключ годится только для проверки.
+    """
+
+    def __init__(
+        self,
+        kid: str | None,
+        algorithm: str,
+        verifying_key: Any,
+        signing_key: Any = None,
+    ):
+        self.kid = kid
+        self.algorithm = algorithm
+        self.verifying_key = verifying_key
+        self.signing_key = signing_key
+
+    @classmethod
+    def from_pem(
+        cls,
+        algorithm: str,
+        public_pem: bytes,
+        private_pem: bytes | None = None,
+        kid: str | None = None,
+    ) -> "Signer":
+        prepare_key = jwt.get_algorithm_by_name(algorithm).prepare_key
+        verifying_key = prepare_key(public_pem)
+        thumbprint = key_thumbprint(algorithm, verifying_key)
+        signing_key = prepare_key(private_pem) if private_pem else None
+        # Файлы пары заменяются по одному: приватный ключ от новой пары
+        # со старым публичным подписал бы токены, которые не проверить
+        if signing_key is not None and (
+            key_thumbprint(algorithm, signing_key) != thumbprint
+        ):
+            raise InvalidKeyError("Private key does not match the public key")
+        return cls(
+            kid=kid or thumbprint,
+            algorithm=algorithm,
+            verifying_key=verifying_key,
+            signing_key=signing_key,
+        )
+
+    @classmethod
+    def from_secret(
+        cls,
+        algorithm: str,
+        secret: bytes,
+        kid: str | None = None,
+    ) -> "Signer":
+        key = jwt.get_algorithm_by_name(algorithm).prepare_key(secret)
+        # Отпечаток общего секрета - это sha256 самого секрета, в заголовок
+        # токена он попадать не должен. Без настроенного kid токен выдается
+        # без kid и проверяется активным ключом
+        return cls(
+            kid=kid,
+            algorithm=algorithm,
+            verifying_key=key,
+            signing_key=key,
+        )
+
+    @property
+    def can_sign(self) -> bool:
+        return self.signing_key is not None
+
+    def encode(
+        self,
+        payload: dict,
+        expire_minutes: int,
+        expire_timedelta: timedelta | None = None,
+    ) -> str:
+        return encode_jwt(
+            payload=payload,
+            private_key=self.signing_key,
+            algorithm=self.algorithm,
+            expire_minutes=expire_minutes,
+            expire_timedelta=expire_timedelta,
+            kid=self.kid,
+        )
+
+    def decode(self, token: str | bytes) -> dict:
+        return decode_jwt(
+            token=token,
+            public_key=self.verifying_key,
+            algorithm=self.algorithm,
+        )
+
+
+def bcrypt_hash(password: str, rounds: int) -> str:
+    salt = bcrypt.gensalt(rounds=rounds)
     pwd_bites: bytes = password.encode()
-    return bcrypt.hashpw(pwd_bites, salt)
+    # Храним хэш в родном для bcrypt виде: 60 ASCII-символов "$2b$..."
+    return bcrypt.hashpw(pwd_bites, salt).decode()
+
+
+def scrypt_hash(password: str, n: int, r: int, p: int) -> str:
+    salt = os.urandom(16)
+    derived = hashlib.scrypt(
+        password.encode(),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        maxmem=_scrypt_maxmem(n, r),
+        dklen=32,
+    )
+    return (
+        f"{SCRYPT_PREFIX}ln={n.bit_length() - 1},r={r},p={p}"
+        f"${_b64encode(salt)}${_b64encode(derived)}"
+    )
+
+
+def argon2_hash(
+    password: str,
+    time_cost: int,
+    memory_cost: int,
+    parallelism: int,
+) -> str:
+    return _argon2_hasher(time_cost, memory_cost, parallelism).hash(password)
+
+
+def hash_password(password: str) -> str:
+    config = setting.hashing
+    if config.scheme == "scrypt":
+        return scrypt_hash(
+            password,
+            n=config.scrypt_n,
+            r=config.scrypt_r,
+            p=config.scrypt_p,
+        )
+    if config.scheme == "argon2":
+        return argon2_hash(
+            password,
+            time_cost=config.argon2_time_cost,
+            memory_cost=config.argon2_memory_cost,
+            parallelism=config.argon2_parallelism,
+        )
+    return bcrypt_hash(password, rounds=config.bcrypt_rounds)
 
 
 def validates_password(
     password: str,
     password_hash: str,
 ) -> bool:
-    password_hash = bytes.fromhex(password_hash)
-    return bcrypt.checkpw(
-        password=password.encode(),
-        hashed_password=password_hash,
+    if password_hash.startswith(SCRYPT_PREFIX):
+        try:
+            params, salt, expected = _parse_scrypt(password_hash)
+            derived = hashlib.scrypt(
+                password.encode(),
+                salt=salt,
+                maxmem=_scrypt_maxmem(params["n"], params["r"]),
+                dklen=len(expected),
+                **params,
+            )
+        except (ValueError, KeyError, OverflowError):
+            # Поврежденный хэш или недопустимые параметры - вход отклоняется с 401
+            return False
+        return hmac.compare_digest(derived, expected)
+    if password_hash.startswith(ARGON2_PREFIX):
+        hasher = _argon2_hasher()
+        try:
+            return hasher.verify(password_hash, password)
+        except (
+            argon2_exceptions.VerificationError,
+            argon2_exceptions.InvalidHashError,
+        ):
+            # Неверный пароль или поврежденный хэш - вход отклоняется с 401
+            return False
+    try:
+        return bcrypt.checkpw(
+            password=password.encode(),
+            hashed_password=password_hash.encode(),
+        )
+    except ValueError:
+        # Поврежденный хэш (Invalid salt) - вход отклоняется с 401
+        return False
+
+
+def password_needs_rehash(password_hash: str) -> bool:
+    """
+    Проверяем, соответствует ли сохраненный хэш текущей политике
+    (схема и параметры стоимости из setting.hashing)
+    args:
+        password_hash: str - Сохраненный хэш
+    return:
+        bool - True, если хэш нужно пересчитать
+    """
+    config = setting.hashing
+    if password_hash.startswith(SCRYPT_PREFIX):
+        if config.scheme != "scrypt":
+            return True
+        params, _, _ = _parse_scrypt(password_hash)
+        return params != {
+            "n": config.scrypt_n,
+            "r": config.scrypt_r,
+            "p": config.scrypt_p,
+        }
+    if password_hash.startswith(ARGON2_PREFIX):
+        if config.scheme != "argon2":
+            return True
+        return _argon2_hasher(
+            config.argon2_time_cost,
+            config.argon2_memory_cost,
+            config.argon2_parallelism,
+        ).check_needs_rehash(password_hash)
+    if config.scheme != "bcrypt":
+        return True
+    # "$2b$12$..." - стоимость хранится во втором поле
+    return int(password_hash.split("$")[2]) != config.bcrypt_rounds
+
+
+def _scrypt_maxmem(n: int, r: int) -> int:
+    return 128 * n * r * 2
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def _parse_scrypt(password_hash: str) -> tuple[dict, bytes, bytes]:
+    # $scrypt$ln=14,r=8,p=1$<salt>$<hash>
+    _, _, raw_params, salt, derived = password_hash.split("$")
+    values = dict(item.split("=") for item in raw_params.split(","))
+    params = {"n": 2 ** int(values["ln"]), "r": int(values["r"]), "p": int(values["p"])}
+    return params, _b64decode(salt), _b64decode(derived)
+
+
+def _argon2_hasher(
+    time_cost: int | None = None,
+    memory_cost: int | None = None,
+    parallelism: int | None = None,
+) -> "Argon2Hasher":
+    if Argon2Hasher is None:
+        raise RuntimeError("argon2 password hashes require the 'argon2-cffi' package")
+    config = setting.hashing
+    return Argon2Hasher(
+        time_cost=time_cost or config.argon2_time_cost,
+        memory_cost=memory_cost or config.argon2_memory_cost,
+        parallelism=parallelism or config.argon2_parallelism,
     )
@@ -0,0 +1,120 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Literal, TypeVar
+
+from fastapi import HTTPException, status
+
+T = TypeVar("T")
+
+
+class WorkerPool:
+    """
+    Ограниченный пул потоков/процессов для CPU-задач вне event loop.
+    Если очередь заполнена, новые задачи отклоняются с 503.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        kind: Literal["thread", "process"] = "thread",
+        max_workers: int | None = None,
+        max_queue: int = 128,
+    ):
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self._executor: Executor | None = None
+        self._in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    @property
+    def executor(self) -> Executor:
+        # Пул создается лениво, чтобы процессы/потоки не стартовали при импорте
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=self.name,
+                )
+        return self._executor
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return max(0, self._in_flight - self.max_workers)
+
+    @property
+    def saturated(self) -> bool:
+        return self._in_flight >= self.max_workers + self.max_queue
+
+    def check_capacity(self) -> None:
+        """Отклоняем задачу (503), если пул и его очередь заполнены"""
+        if self.saturated:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"Worker pool {self.name!r} is overloaded, try again later",
+                headers={"Retry-After": "1"},
+            )
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """
+        Выполняем func в пуле
+        args:
+            func: Callable - функция (для process-пула должна быть picklable)
+            args: Any - аргументы функции
+        return:
+            result: T - Результат функции
+        """
+        self.check_capacity()
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        self.submitted += 1
+        start = time.perf_counter()
+        try:
+            result = await loop.run_in_executor(self.executor, func, *args)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self._in_flight -= 1
+            elapsed = time.perf_counter() - start
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        finished = self.completed + self.failed
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "queued": self.queued,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "avg_seconds": self.total_seconds / finished if finished else 0.0,
+            "max_seconds": self.max_seconds,
+        }
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=not wait)
+            self._executor = None